@@ -0,0 +1,290 @@
+from simulation import *
+import argparse
+import json
+import time
+import sys
+import tracemalloc
+import platform
+import datetime
+
+############################################################
+# SCENARIOS — late-game boards, kept at a steady load
+############################################################
+# Every scenario starts on Day 5, Wave 3 and is topped back up before
+# each tick (outside the timed region), so zombies that die or reach the
+# fence, destroyed structures, exploded drones and bullets that hit or
+# left the screen are replaced and the load stays where the scenario
+# says it is. bulletGap is the widest spacing allowed between bullets
+# in a turret's row, from the left edge up to its rightmost muzzle.
+SCENARIOS = {
+    'full-board': {
+        'zombies': 200, 'turrets': 60, 'stations': 20, 'drones': 10,
+    },
+    'bullet-saturated': {
+        'zombies': 60, 'turrets': 64, 'bulletGap': 4,
+    },
+    'zombie-horde': {
+        'zombies': 500,
+    },
+    'structures-only': {
+        'turrets': 60, 'stations': 20, 'drones': 10,
+    },
+    'empty-field': {},
+}
+
+DEFAULT_TICKS = 600
+
+def placementCells(app):
+    # Field cells left of the fence in rows 1-7, the rows zombies walk
+    # in (y 100-750), filled column by column from the right so
+    # structures meet zombies first.
+    rows = range(1, 8)
+    cols = range(int(app.fenceLeft // app.tileW) - 1, 0, -1)
+    return [(row, col) for col in cols for row in rows]
+
+def spawnZombie(app, x):
+    kind = ZombieFast if app.rng.randint(0, 5) == 5 else Zombie
+    z = acquire(app, kind, app, app.waveInLevel)
+    z.x = z.prevX = x
+    app.zombies.append(z)
+    if app.useZombieStore:
+        release(app, z)     # the store copied it
+
+def setupScenario(app, name):
+    spec = SCENARIOS[name]
+    resetSimulation(app, seed=0)
+    app.level = app.maxLevels
+    app.waveInLevel = app.maxWavesPerLevel
+
+    cells = placementCells(app)
+    numTurrets = spec.get('turrets', 0)
+    numStations = spec.get('stations', 0)
+    for i, (row, col) in enumerate(cells[:numTurrets + numStations]):
+        cx = col * app.tileW + app.tileW / 2
+        cy = row * app.tileH + app.tileH / 2
+        if i < numTurrets:
+            placeTurret(app, cx, cy)
+        else:
+            placeStation(app, cx, cy)
+
+    # spread the first horde over the field instead of one column
+    for _ in range(spec.get('zombies', 0)):
+        spawnZombie(app, app.rng.uniform(-200, app.fenceLeft - 100))
+    topUp(app, name)
+
+def topUp(app, name):
+    spec = SCENARIOS[name]
+    app.baseHP = BASE_MAX_HP
+    app.gameOver = False
+    app.waveTimer = max(app.waveTimer, STEPS_PER_SECOND)
+
+    for _ in range(spec.get('zombies', 0) - len(app.zombies)):
+        spawnZombie(app, -200)
+
+    refill(app, placeTurret, spec.get('turrets', 0) - len(app.turrets))
+    refill(app, placeStation, spec.get('stations', 0) - len(app.healthStations))
+
+    for _ in range(spec.get('drones', 0) - len(app.drones)):
+        app.drones.append(Drone(app.rng.uniform(100, app.fenceLeft),
+                                app.rng.uniform(150, 700)))
+
+    if 'bulletGap' in spec:
+        fillLanes(app, spec['bulletGap'])
+
+def fillLanes(app, gap):
+    # close every gap wider than `gap` in the rows that have turrets
+    muzzles = {}
+    for turret in app.turrets:
+        muzzle = turret.x - 35
+        if muzzle > muzzles.get(turret.y, 0):
+            muzzles[turret.y] = muzzle
+    for y, muzzle in muzzles.items():
+        xs = [b.x for b in app.bullets.laneOf(y) if b.x < muzzle]
+        prev = 0
+        for x in xs + [muzzle]:
+            while x - prev > gap:
+                prev += gap
+                app.bullets.append(acquire(app, Bullet, prev, y))
+            prev = x
+
+def refill(app, place, missing):
+    if missing <= 0:
+        return
+    for (row, col) in placementCells(app):
+        cx = col * app.tileW + app.tileW / 2
+        cy = row * app.tileH + app.tileH / 2
+        if isLegalPlacement(app, cx, cy):
+            place(app, cx, cy)
+            missing -= 1
+            if missing == 0:
+                return
+
+def scenarioCursor(app):
+    # the flashlight holds on the zombie closest to the fence
+    if len(app.zombies) == 0:
+        return app.cursor
+    lead = max(app.zombies, key=lambda z: z.x)
+    return (lead.x, lead.y)
+
+############################################################
+# RESULTS
+############################################################
+def percentile(samples, p):
+    ordered = sorted(samples)
+    i = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[i]
+
+def summarize(name, stepTimes, redrawTimes=None):
+    result = {
+        'scenario': name,
+        'ticks': len(stepTimes),
+        'ticksPerSec': round(len(stepTimes) / sum(stepTimes), 1),
+        'stepP50Ms': round(percentile(stepTimes, 50) * 1000, 4),
+        'stepP99Ms': round(percentile(stepTimes, 99) * 1000, 4),
+        'redrawP50Ms': None,
+        'redrawP99Ms': None,
+    }
+    if redrawTimes:
+        result['redrawP50Ms'] = round(percentile(redrawTimes, 50) * 1000, 4)
+        result['redrawP99Ms'] = round(percentile(redrawTimes, 99) * 1000, 4)
+    return result
+
+############################################################
+# MEMORY — bytes per entity, measured with tracemalloc
+############################################################
+MEMORY_COUNT = 10000
+HORDE_SIZE = 5000
+
+def tracedBytes(build):
+    # Bytes still allocated by whatever build() returns.
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+def entityFactories(app):
+    return {
+        'Zombie': lambda: Zombie(app, 1),
+        'ZombieFast': lambda: ZombieFast(app, 1),
+        'Turret': lambda: Turret(500, 450),
+        'HealthStation': lambda: HealthStation(500, 450),
+        'Bullet': lambda: Bullet(500, 450),
+        'Drone': lambda: Drone(500, 450),
+        'ExplodingDrone': lambda: ExplodingDrone(500, 450),
+        'Explosion': lambda: Explosion(500, 450),
+    }
+
+def memoryReport(extraFactories=None):
+    app = HeadlessApp()
+    setupSimulation(app)
+    resetSimulation(app, seed=0)
+    factories = entityFactories(app)
+    if extraFactories:
+        factories.update(extraFactories)
+
+    report = {}
+    for name, make in factories.items():
+        size = tracedBytes(lambda: [make() for _ in range(MEMORY_COUNT)])
+        listBytes = sys.getsizeof([None] * MEMORY_COUNT)
+        report[name] = round((size - listBytes) / MEMORY_COUNT, 1)
+
+    # a whole horde, as the game holds it
+    for store in ([False, True] if HAVE_NUMPY else [False]):
+        app.useZombieStore = store
+        resetSimulation(app, seed=0)
+        def spawnHorde():
+            for _ in range(HORDE_SIZE):
+                spawnZombie(app, -200)
+            return app.zombies
+        key = f"horde{HORDE_SIZE}{'Store' if store else 'Objects'}"
+        report[key] = tracedBytes(spawnHorde)
+    return report
+
+def printMemory(report):
+    print(f"{'entity':22} {'bytes':>10}")
+    for name, size in report.items():
+        print(f"{name:22} {size:10}")
+
+def writeResults(path, results, mode, label=None, zombieStore=False, memory=None,
+                 renderer=None):
+    report = {
+        'label': label,
+        'mode': mode,
+        'renderer': renderer,
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'numpy': HAVE_NUMPY,
+        'zombieStore': zombieStore,
+        'scenarios': results,
+        'memoryBytes': memory,
+    }
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+
+def printResults(results, baseline=None):
+    before = {}
+    if baseline:
+        with open(baseline) as f:
+            before = {r['scenario']: r for r in json.load(f)['scenarios']}
+
+    print(f"{'scenario':18} {'ticks/s':>10} {'step p50':>9} {'step p99':>9} "
+          f"{'draw p50':>9} {'draw p99':>9}")
+    for r in results:
+        redraw = ''
+        if r['redrawP50Ms'] is not None:
+            redraw = f"{r['redrawP50Ms']:8.3f}m {r['redrawP99Ms']:8.3f}m"
+        line = (f"{r['scenario']:18} {r['ticksPerSec']:10.1f} "
+                f"{r['stepP50Ms']:8.3f}m {r['stepP99Ms']:8.3f}m {redraw}")
+        draws = r.get('drawCalls')
+        if draws:
+            line += (f"  {draws['maxDraws']} draws max, "
+                     f"{draws['overBudget']}/{draws['frames']} frames over budget")
+        old = before.get(r['scenario'])
+        if old:
+            line += f"  ({r['ticksPerSec'] / old['ticksPerSec']:.2f}x ticks/s)"
+        print(line)
+
+############################################################
+# HEADLESS RUN — step timings only
+############################################################
+def runScenario(name, ticks=DEFAULT_TICKS, zombieStore=False):
+    sim = Simulation(zombieStore=zombieStore)
+    app = sim.app
+    setupScenario(app, name)
+    stepTimes = []
+    for _ in range(ticks):
+        topUp(app, name)
+        inputs = {'cursor': scenarioCursor(app)}
+        start = time.perf_counter()
+        sim.step(inputs)
+        stepTimes.append(time.perf_counter() - start)
+    return summarize(name, stepTimes)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Time the simulation on named late-game scenarios. "
+                    "Run final_product.py --benchmark for redraw times.")
+    parser.add_argument('scenarios', nargs='*', default=list(SCENARIOS),
+                        help=f"any of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--ticks', type=int, default=DEFAULT_TICKS)
+    parser.add_argument('--store', action='store_true',
+                        help="use the NumPy zombie store")
+    parser.add_argument('--out', default='benchmark.json')
+    parser.add_argument('--label', help="name for this run, e.g. a commit")
+    parser.add_argument('--baseline', metavar='PATH',
+                        help="earlier results to compare ticks/s against")
+    args = parser.parse_args()
+
+    results = [runScenario(name, args.ticks, args.store)
+               for name in args.scenarios]
+    memory = memoryReport()
+    writeResults(args.out, results, 'headless', args.label, args.store, memory)
+    printResults(results, args.baseline)
+    print()
+    printMemory(memory)
+    print(f"wrote {args.out}")
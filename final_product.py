@@ -1,7 +1,44 @@
 from cmu_graphics import *
+from simulation import *
+from renderer import makeRenderer, CountingRenderer, PILRenderer, RENDERERS
+import benchmark
 import socket
 import random
-import math
+import argparse
+import os
+import time
+
+try:
+    from PIL import Image as PILImage, ImageDraw
+except ImportError:
+    PILImage = None     # no baked background; layers are drawn one by one
+
+############################################################
+# COMMAND LINE — seeding, recording and replaying games
+############################################################
+parser = argparse.ArgumentParser(description="Fence Defense")
+parser.add_argument('--seed', type=int, help="seed for the first game")
+parser.add_argument('--record', metavar='PATH',
+                    help="record every game's inputs (later games get -2, -3, ...)")
+parser.add_argument('--replay', metavar='PATH',
+                    help="play back a recording instead of live input")
+parser.add_argument('--benchmark', metavar='PATH', nargs='?', const='benchmark.json',
+                    help="run the benchmark scenarios with redraw timings and quit")
+parser.add_argument('--bench-ticks', type=int, default=benchmark.DEFAULT_TICKS)
+parser.add_argument('--store', action='store_true',
+                    help="use the NumPy zombie store")
+parser.add_argument('--renderer', choices=RENDERERS, default='cmu',
+                    help="drawing backend (null draws nothing, for benchmarking)")
+parser.add_argument('--quality', type=int, metavar='TIER',
+                    help="pin a quality tier (0 = full) instead of adapting")
+parser.add_argument('--draw-budget', type=int, metavar='N',
+                    help="count draw calls per draw function and flag frames over N")
+args, _ = parser.parse_known_args()
+
+# every draw call in this file goes through it; see renderer.py
+renderer = makeRenderer(args.renderer, SCREEN_W, SCREEN_H)
+if args.draw_budget is not None:
+    renderer = CountingRenderer(renderer, args.draw_budget)
 
 ############################################################
 # NETWORK SETUP — receives flashlight coords from OpenCV
@@ -11,64 +48,231 @@ sock.bind(("127.0.0.1", 5005))
 sock.setblocking(False)
 
 ############################################################
-# SCREEN SIZE
+# FRAME RATE — onStep/redraw run at RENDER_FPS; the simulation itself
+# always ticks at STEPS_PER_SECOND through app.clock
 ############################################################
-SCREEN_W = 1512
-SCREEN_H = 1000
+RENDER_FPS = 60
 
 ############################################################
-# BASE HP
+# SOUNDS — played for the events the simulation reports
 ############################################################
-BASE_MAX_HP = 25
+SOUNDS = {
+    'turretPlaced': Sound('sounds/place1.mp3'),
+    'stationPlaced': Sound('sounds/place2.mp3'),
+    'droneLaunched': Sound('sounds/drone.mp3'),
+    'droneExploded': Sound('sounds/explosion.mp3'),
+    'levelUp': Sound('sounds/levelUp.mp3'),
+}
+
+def playEvents(app):
+    for event in app.events:
+        SOUNDS[event].play()
+    app.events.clear()
 
 ############################################################
 # UTILS
 ############################################################
-def clamp(val, lo, hi):
-    return max(lo, min(hi, val))
+# Image metadata cache: path -> (w, h), and (path, maxW, maxH) -> the
+# size drawImageFit draws at. Primed in onAppStart so redraws never
+# probe an image header.
+imageSizes = {}
+fitSizes = {}
+
+def imageSize(imgPath):
+    size = imageSizes.get(imgPath)
+    if size is None:
+        size = imageSizes[imgPath] = renderer.imageSize(imgPath)
+    return size
+
+def fitSize(imgPath, maxW, maxH):
+    key = (imgPath, maxW, maxH)
+    size = fitSizes.get(key)
+    if size is None:
+        w, h = imageSize(imgPath)
+        scale = min(maxW / w, maxH / h)
+        size = fitSizes[key] = (w * scale, h * scale)
+    return size
+
+def drawImageFit(canvas, imgPath, cx, cy, maxW, maxH):
+    newW, newH = fitSize(imgPath, maxW, maxH)
+    canvas.drawImage(imgPath, cx, cy, align='center', width=newW, height=newH)
+
+############################################################
+# SPRITES — every game sprite preloaded once into an image handle
+############################################################
+TILE_IMAGE = "images/grassTile.png"
+
+def loadSprite(path):
+    # The renderer's own image handle; asking for its size makes the
+    # backend decode it now instead of on the first frame it shows up in.
+    handle = renderer.loadImage(path)
+    imageSize(handle)
+    return handle
+
+def loadSprites(app):
+    paths = [TILE_IMAGE, GrassSprite.image, *Flower.flowerImages,
+             Turret.image, HealthStation.image, Bullet.image, Drone.image,
+             *app.itemImages]
+    app.sprites = {path: loadSprite(path) for path in paths}
+
+    # zombie atlas: (walk frames, attack frames) per archetype
+    app.zombieAtlas = [([loadSprite(path) for path in kind.images],
+                        [loadSprite(path) for path in kind.attackFrames])
+                       for kind in ZOMBIE_TYPES]
+
+    # half-extents of the largest frame per archetype, for culling
+    app.zombieExtents = []
+    for walkFrames, attackFrames in app.zombieAtlas:
+        sizes = [imageSize(frame) for frame in walkFrames + attackFrames]
+        app.zombieExtents.append((max(w for w, h in sizes) / 2,
+                                  max(h for w, h in sizes) / 2))
+
+############################################################
+# VIEWPORT CULLING — skip anything wholly outside the screen
+############################################################
+def onScreen(x, y, halfW, halfH):
+    return (x + halfW >= 0 and x - halfW <= SCREEN_W and
+            y + halfH >= 0 and y - halfH <= SCREEN_H)
+
+############################################################
+# LEVEL OF DETAIL — drops per-entity extras on crowded boards
+############################################################
+# Each detail is dropped while its entity count is above the threshold
+# and comes back once the count falls under LOD_RESTORE of it, so a
+# board sitting right on a threshold doesn't flicker between the two.
+LOD_THRESHOLDS = {
+    'fullHealthBars': 150,  # zombies + structures: hide bars at full HP
+    'walkAnimation': 250,   # zombies: hold the first walk frame
+    'effects': 40,          # explosions + drone blasts: half budget, flat fill
+}
+LOD_RESTORE = 0.8
+
+def detailCounts(app):
+    return {
+        'fullHealthBars': (len(app.zombies) + len(app.turrets) +
+                           len(app.healthStations)),
+        'walkAnimation': len(app.zombies),
+        'effects': len(app.effects) + len(app.explodingDrones),
+    }
+
+def updateDetail(app):
+    for name, count in detailCounts(app).items():
+        threshold = LOD_THRESHOLDS[name]
+        if count > threshold:
+            app.crowdedDetail.add(name)
+        elif count < threshold * LOD_RESTORE:
+            app.crowdedDetail.discard(name)
+    # lower quality tiers drop some details whatever the counts
+    app.reducedDetail = app.crowdedDetail | qualityTier(app)['reduce']
+
+############################################################
+# ADAPTIVE QUALITY — steps detail down when frames run long
+############################################################
+# Tier 0 is full quality. decorEvery draws every n-th grass blade and
+# flower (0 = none; only matters without a baked background),
+# effectShare scales EFFECT_BUDGET, overlays covers the heal pulse, and
+# reduce drops LOD_THRESHOLDS details regardless of entity counts.
+QUALITY_TIERS = [
+    {'decorEvery': 1, 'effectShare': 1.0, 'overlays': True, 'reduce': set()},
+    {'decorEvery': 2, 'effectShare': 0.75, 'overlays': True, 'reduce': set()},
+    {'decorEvery': 2, 'effectShare': 0.5, 'overlays': False,
+     'reduce': {'fullHealthBars'}},
+    {'decorEvery': 0, 'effectShare': 0.25, 'overlays': False,
+     'reduce': {'fullHealthBars', 'walkAnimation', 'effects'}},
+]
+
+if args.quality is not None and not 0 <= args.quality < len(QUALITY_TIERS):
+    parser.error(f"--quality must be 0-{len(QUALITY_TIERS) - 1}")
+
+class QualityController:
+    # Keeps a rolling average of frame time (the step plus the redraw),
+    # warmed up at headroom * budget rather than the first sample, and
+    # moves one tier down after downAfter frames in a row over budget, or
+    # one tier up after upAfter frames under headroom * budget.
+    smoothing = 0.1
+    downAfter = 15
+    upAfter = 180
+    headroom = 0.6
+
+    def __init__(self, budgetMs, tier=0, adaptive=True):
+        self.budgetMs = budgetMs
+        self.tier = tier
+        self.adaptive = adaptive
+        self.frameMs = budgetMs * self.headroom
+        self.slowFrames = 0
+        self.fastFrames = 0
+        self.changes = 0
+
+    def update(self, frameMs):
+        self.frameMs += (frameMs - self.frameMs) * self.smoothing
+        if not self.adaptive:
+            return
+        if self.frameMs > self.budgetMs:
+            self.slowFrames += 1
+            self.fastFrames = 0
+        elif self.frameMs < self.budgetMs * self.headroom:
+            self.fastFrames += 1
+            self.slowFrames = 0
+        else:
+            self.slowFrames = self.fastFrames = 0
 
-def drawImageFit(imgPath, cx, cy, maxW, maxH):
-    # Load image metadata
-    w, h = getImageSize(imgPath)   # cmu_graphics built-in
+        if self.slowFrames >= self.downAfter and self.tier < len(QUALITY_TIERS) - 1:
+            self.setTier(self.tier + 1)
+        elif self.fastFrames >= self.upAfter and self.tier > 0:
+            self.setTier(self.tier - 1)
 
-    scale = min(maxW / w, maxH / h)
-    newW = w * scale
-    newH = h * scale
+    def setTier(self, tier):
+        self.tier = tier
+        self.changes += 1
+        self.slowFrames = self.fastFrames = 0
 
-    drawImage(imgPath, cx, cy, align='center', width=newW, height=newH)
+def qualityTier(app):
+    return QUALITY_TIERS[app.quality.tier]
+
+def decorations(app, sprites):
+    every = qualityTier(app)['decorEvery']
+    return sprites[::every] if every else []
+
+def primeImageCache(app):
+    for i in range(app.numRects):
+        imgPath, cx, cy, maxW, maxH = slotIcon(app, i)
+        fitSize(imgPath, maxW, maxH)
 
 
 ############################################################
 # BACKGROUND FUNCTIONS
 ############################################################
 def generateGrass(app):
+    rng = app.decorRng
     density = 0.1
     for row in range(app.tilesHigh):
         for col in range(app.tilesWide):
-            if random.random() < density:
-                cx = col * app.tileW + app.tileW/2 + random.randint(-40, 40)
-                cy = row * app.tileH + app.tileH/2 + random.randint(-30, 30)
-                scale = random.uniform(0.4, 1.0)
-                app.grassSprites.append({'x': cx, 'y': cy, 'scale': scale})
+            if rng.random() < density:
+                cx = col * app.tileW + app.tileW/2 + rng.randint(-40, 40)
+                cy = row * app.tileH + app.tileH/2 + rng.randint(-30, 30)
+                scale = rng.uniform(0.4, 1.0)
+                app.grassSprites.append(GrassSprite(cx, cy, scale))
 
 def generateFlowers(app):
+    rng = app.decorRng
     density = 0.15
     for row in range(app.tilesHigh):
         for col in range(app.tilesWide):
-            if random.random() < density:
-                cx = col * app.tileW + app.tileW/2 + random.randint(-40, 40)
-                cy = row * app.tileH + app.tileH/2 +random.randint(-30, 30)
-                scale = random.uniform(0.3, 0.8)
-                app.flowers.append(Flower(cx, cy, scale))
+            if rng.random() < density:
+                cx = col * app.tileW + app.tileW/2 + rng.randint(-40, 40)
+                cy = row * app.tileH + app.tileH/2 +rng.randint(-30, 30)
+                scale = rng.uniform(0.3, 0.8)
+                app.flowers.append(Flower(cx, cy, scale, rng))
 
 
 def drawTiles(app):
+    tile = app.sprites[TILE_IMAGE]
     for row in range(app.tilesHigh):
         for col in range(app.tilesWide):
             x = col * app.tileW
             y = row * app.tileH
-            drawImage(
-                "images/grassTile.png",
+            renderer.drawImage(
+                tile,
                 x, y,
                 align='top-left',
                 width=app.tileW,
@@ -77,303 +281,169 @@ def drawTiles(app):
 
 
 def drawGrass(app):
-    for blade in app.grassSprites:
-        drawImage(
-            "images/grass.png",
-            blade['x'], blade['y'],
+    image = app.sprites[GrassSprite.image]
+    for blade in decorations(app, app.grassSprites):
+        renderer.drawImage(
+            image,
+            blade.x, blade.y,
             align='center',
-            width=50 * blade['scale'],
-            height=50 * blade['scale']
+            width=50 * blade.scale,
+            height=50 * blade.scale
         )
 
 def drawFlowers(app):
-    for flower in app.flowers:
-        drawImage(flower.image, flower.x, flower.y, 
+    for flower in decorations(app, app.flowers):
+        renderer.drawImage(app.sprites[flower.image], flower.x, flower.y, 
                 align='center', width = 30*flower.scale,
                 height=30*flower.scale)
 
 
 def drawFence(app):
     for (x, y1, y2, thickness) in app.fencePlanks:
-        drawRect(x - thickness/2, y1,
-                 thickness, y2 - y1,
-                 fill=rgb(38, 85, 255),
-                 border=rgb(47, 47, 252))
+        renderer.drawRect(x - thickness/2, y1,
+                          thickness, y2 - y1,
+                          fill=renderer.rgb(38, 85, 255),
+                          border=renderer.rgb(47, 47, 252))
 
     for (x, y, r) in app.fencePosts:
-        drawCircle(x, y, r,
-                   fill=rgb(75, 127, 252),
-                   border=rgb(37, 79, 179))
+        renderer.drawCircle(x, y, r,
+                            fill=renderer.rgb(75, 127, 252),
+                            border=renderer.rgb(37, 79, 179))
         
-def drawGameText(text, x, y, size=20, color='white', align='center'):
-    drawLabel(text, x+1, y+1, size=size, bold=True, fill='black', align=align)
-    drawLabel(text, x, y, size=size, bold=True, fill=color, align=align)
-
-
 ############################################################
-# ZOMBIE CLASS — WALK, ATTACK, HP, FLASHLIGHT DAMAGE
+# BAKED BACKGROUND — tiles, grass, fence and flowers composited
+# into one image after resetGame regenerates the decorations
 ############################################################
-class Zombie:
-    def __init__(self, app, wave):
-        # position + collision radius
-        self.x = -200
-        self.y = random.randint(100, 750)
-        self.r = 30
-
-        # movement speed based on wave
-        self.speed = random.uniform(4.0, 6.0) + 0.35 * (wave - 1)
-
-        # walking animation frames (zom0, zom1, zom2)
-        self.images = app.zombieFrames1
-        self.frame = 0
-        self.animDelay = 5
-        self.animTimer = 0
-
-        # ----- ATTACKING STATE -----
-        self.attacking = False              # zombie stops moving at fence
-        self.attackTimer = 0                # deal damage every 30 frames
-        self.attackAnimTimer = 0            # animation timer
-        self.attackAnimDelay = 10           # switch zom3 ↔ zom4 every 10 frames
-        self.attackAnimFrame = 0            # 0 or 1 (index into attackFrames)
-        self.attackFrames1 = app.attackFrames1  # zom3, zom4
-
-        # ----- FLASHLIGHT DAMAGE -----
-        self.requiredTime = 30      # 1 second at 30 FPS
-        self.timeOnCursor = 0       # accumulates flashlight damage
-
-    ########################################################
-    # MOVE + WALK OR ATTACK ANIMATION
-    ########################################################
-    def update(self):
-        # If zombie is attacking the fence, it does NOT move.
-        if self.attacking:
-            # attack animation
-            self.attackAnimTimer += 1
-            if self.attackAnimTimer >= self.attackAnimDelay:
-                self.attackAnimFrame = (self.attackAnimFrame + 1) % 2
-                self.attackAnimTimer = 0
-            return
+def bakeBackground(app):
+    if PILImage is None:
+        return None
+    canvas = PILImage.new('RGB', (SCREEN_W, SCREEN_H))
+    sources = {}
+    sprites = {}
+
+    def paste(path, x, y, width, height, align='center'):
+        width, height = max(1, pythonRound(width)), max(1, pythonRound(height))
+        key = (path, width, height)
+        if key not in sprites:
+            if path not in sources:
+                sources[path] = PILImage.open(path).convert('RGBA')
+            sprites[key] = sources[path].resize((width, height), PILImage.LANCZOS)
+        if align == 'center':
+            x -= width / 2
+            y -= height / 2
+        canvas.paste(sprites[key], (pythonRound(x), pythonRound(y)), sprites[key])
+
+    # tiles: snap edges to whole pixels so neighbours never leave a gap
+    for row in range(app.tilesHigh):
+        for col in range(app.tilesWide):
+            x0, x1 = pythonRound(col * app.tileW), pythonRound((col + 1) * app.tileW)
+            y0, y1 = pythonRound(row * app.tileH), pythonRound((row + 1) * app.tileH)
+            paste(TILE_IMAGE, x0, y0, x1 - x0, y1 - y0, align='top-left')
 
-        # walking movement
-        self.x += self.speed
-
-        # walking animation
-        self.animTimer += 1
-        if self.animTimer >= self.animDelay:
-            self.frame = (self.frame + 1) % len(self.images)
-            self.animTimer = 0
-
-    ########################################################
-    # CURSOR HIT DETECTION
-    ########################################################
-    def hit(self, cx, cy):
-        return math.dist((self.x, self.y), (cx, cy)) < self.r
-
-    ########################################################
-    # FLASHLIGHT DAMAGE
-    ########################################################
-    def applyFlashlightDamage(self):
-        self.timeOnCursor += 1
-
-    def isDead(self):
-        return self.timeOnCursor >= self.requiredTime
-
-    ########################################################
-    # DRAW ZOMBIE + HEALTH BAR
-    ########################################################
-    def draw(self):
-        if self.attacking:
-            # attack animation (zom3, zom4)
-            drawImage(self.attackFrames1[self.attackAnimFrame],
-                      self.x, self.y, align='center')
-        else:
-            # normal walking animation (zom0–zom2)
-            drawImage(self.images[self.frame],
-                      self.x, self.y, align='center')
+    for blade in app.grassSprites:
+        paste(blade.image, blade.x, blade.y, 50 * blade.scale, 50 * blade.scale)
 
-        # ----- NEW HEALTH BAR (FULL GREEN → RED AS DAMAGE) -----
+    draw = ImageDraw.Draw(canvas)
+    for (x, y1, y2, thickness) in app.fencePlanks:
+        draw.rectangle([x - thickness/2, y1, x + thickness/2, y2],
+                       fill=(38, 85, 255), outline=(47, 47, 252), width=2)
+    for (x, y, r) in app.fencePosts:
+        draw.ellipse([x - r, y - r, x + r, y + r],
+                     fill=(75, 127, 252), outline=(37, 79, 179), width=2)
 
-        barWidth = 40
-        hpPercent = clamp(1 - (self.timeOnCursor / self.requiredTime), 0, 1)
-        greenWidth = barWidth * hpPercent
-        redWidth = barWidth - greenWidth
+    for flower in app.flowers:
+        paste(flower.image, flower.x, flower.y, 30 * flower.scale, 30 * flower.scale)
+
+    return renderer.fromPIL(canvas)
+
+def drawBackground(app):
+    if app.backgroundDirty:
+        renderer.releaseImage(app.backgroundLayer)
+        app.backgroundLayer = bakeBackground(app)
+        app.backgroundDirty = False
+        app.rebakedLayer = True
+    if app.backgroundLayer is not None:
+        renderer.drawImage(app.backgroundLayer, 0, 0)
+    else:
+        drawTiles(app)
+        drawGrass(app)
+        drawFence(app)
 
-        # green — remaining HP
-        if greenWidth > 0:
-            drawRect(self.x - barWidth/2,
-                    self.y - 40,
-                    greenWidth,
-                    6,
-                    fill='lime')
+def drawGameText(canvas, text, x, y, size=20, color='white', align='center'):
+    canvas.drawLabel(text, x+1, y+1, size=size, bold=True, fill='black', align=align)
+    canvas.drawLabel(text, x, y, size=size, bold=True, fill=color, align=align)
 
-        # red — missing HP
-        if redWidth > 0:
-            drawRect(self.x - barWidth/2 + greenWidth,
-                    self.y - 40,
-                    redWidth,
-                    6,
-                    fill='red')
-            
-
-class ZombieFast:
-    def __init__(self, app, wave):
-        # position + collision radius
-        self.x = -200
-        self.y = random.randint(100, 750)
-        self.r = 30
-
-        # movement speed based on wave
-        self.speed = random.uniform(4.0, 6.0) + 0.35 * (wave - 1) +2
-
-        # walking animation frames (zom0, zom1, zom2)
-        self.images = app.zombieFrames2
-        self.frame = 0
-        self.animDelay = 5
-        self.animTimer = 0
-
-        # ----- ATTACKING STATE -----
-        self.attacking = False              # zombie stops moving at fence
-        self.attackTimer = 0                # deal damage every 30 frames
-        self.attackAnimTimer = 0            # animation timer
-        self.attackAnimDelay = 10           # switch zom3 ↔ zom4 every 10 frames
-        self.attackAnimFrame = 0            # 0 or 1 (index into attackFrames)
-        self.attackFrames2 = app.attackFrames2  # zom3, zom4
-
-        # ----- FLASHLIGHT DAMAGE -----
-        self.requiredTime = 30      # 1 second at 30 FPS
-        self.timeOnCursor = 0       # accumulates flashlight damage
-
-    ########################################################
-    # MOVE + WALK OR ATTACK ANIMATION
-    ########################################################
-    def update(self):
-        # If zombie is attacking the fence, it does NOT move.
-        if self.attacking:
-            # attack animation
-            self.attackAnimTimer += 1
-            if self.attackAnimTimer >= self.attackAnimDelay:
-                self.attackAnimFrame = (self.attackAnimFrame + 1) % 2
-                self.attackAnimTimer = 0
-            return
 
-        # walking movement
-        self.x += self.speed
-
-        # walking animation
-        self.animTimer += 1
-        if self.animTimer >= self.animDelay:
-            self.frame = (self.frame + 1) % len(self.images)
-            self.animTimer = 0
-
-    ########################################################
-    # CURSOR HIT DETECTION
-    ########################################################
-    def hit(self, cx, cy):
-        return math.dist((self.x, self.y), (cx, cy)) < self.r
-
-    ########################################################
-    # FLASHLIGHT DAMAGE
-    ########################################################
-    def applyFlashlightDamage(self):
-        self.timeOnCursor += 1
-
-    def isDead(self):
-        return self.timeOnCursor >= self.requiredTime
-
-    ########################################################
-    # DRAW ZOMBIE + HEALTH BAR
-    ########################################################
-    def draw(self):
-        if self.attacking:
+############################################################
+# DRAW ZOMBIE + HEALTH BAR
+############################################################
+def drawZombies(app):
+    alpha = app.clock.alpha
+    atlas = app.zombieAtlas
+    extents = app.zombieExtents
+    frozen = 'walkAnimation' in app.reducedDetail
+    hideFullBars = 'fullHealthBars' in app.reducedDetail
+    for z in app.zombies:
+        x = lerp(z.prevX, z.x, alpha)
+        halfW, halfH = extents[z.archetype]
+        if not onScreen(x, z.y, halfW, halfH):
+            app.culled += 1
+            continue
+        walkFrames, attackFrames = atlas[z.archetype]
+        if z.attacking:
             # attack animation (zom3, zom4)
-            drawImage(self.attackFrames2[self.attackAnimFrame],
-                      self.x, self.y, align='center')
+            renderer.drawImage(attackFrames[z.attackAnimFrame],
+                               x, z.y, align='center')
         else:
             # normal walking animation (zom0–zom2)
-            drawImage(self.images[self.frame],
-                      self.x, self.y, align='center')
+            renderer.drawImage(walkFrames[0 if frozen else z.frame],
+                               x, z.y, align='center')
 
         # ----- NEW HEALTH BAR (FULL GREEN → RED AS DAMAGE) -----
+        if hideFullBars and z.timeOnCursor == 0:
+            continue
 
         barWidth = 40
-        hpPercent = clamp(1 - (self.timeOnCursor / self.requiredTime), 0, 1)
+        hpPercent = clamp(1 - (z.timeOnCursor / z.requiredTime), 0, 1)
         greenWidth = barWidth * hpPercent
         redWidth = barWidth - greenWidth
 
         # green — remaining HP
         if greenWidth > 0:
-            drawRect(self.x - barWidth/2,
-                    self.y - 40,
-                    greenWidth,
-                    6,
-                    fill='lime')
+            renderer.drawRect(x - barWidth/2,
+                             z.y - 40,
+                             greenWidth,
+                             6,
+                             fill='lime')
 
         # red — missing HP
         if redWidth > 0:
-            drawRect(self.x - barWidth/2 + greenWidth,
-                    self.y - 40,
-                    redWidth,
-                    6,
-                    fill='red')
-            
-
-class HealthStation:
-    sound = Sound('sounds/place2.mp3')
-    def __init__(self, x, y):
-        self.image = "images/healthStation.png"
-        self.x = x 
-        self.y = y
-        self.health = 5
-        self.pulse = 5
+            renderer.drawRect(x - barWidth/2 + greenWidth,
+                             z.y - 40,
+                             redWidth,
+                             6,
+                             fill='red')
 
-class Bullet:
-    def __init__(self, x, y):
-        self.image = "images/bullet.png"
-        self.x = x
-        self.y = y
-        self.dx = -4
 
 class Flower:
     flowerImages = ['images/flower1.png', 'images/flower2.png', 'images/flower3.png', 'images/flower4.png']
-    def __init__(self, x, y, scale):
-        self.image= Flower.flowerImages[randrange(0, 4)]
+    __slots__ = ('image', 'x', 'y', 'scale')
+
+    def __init__(self, x, y, scale, rng):
+        self.image= Flower.flowerImages[rng.randrange(0, 4)]
         self.x=x
         self.y=y
         self.scale=scale
 
-def distance(x1, y1, x2, y2):
-    return ((x2 - x1)**2 + (y2 - y1)**2)**0.5
+class GrassSprite:
+    image = "images/grass.png"
+    __slots__ = ('x', 'y', 'scale')
 
-class Turret:
-    sound = Sound('sounds/place1.mp3')
-    def __init__(self, x, y):
-        self.image = "images/turret.png"
-        self.x = x
-        self.y = y
-        self.health = 5        # turrets now have 5 HP
-        self.steps = 0
-
-class Drone:
-    sound = Sound('sounds/drone.mp3')
-    def __init__(self, targetX, targetY):
-        self.image = 'images/drone.png'
-        self.x = targetX
-        self.y = 900
-        self.targetX = targetX
-        self.targetY = targetY
-        self.width = 80
-        self.height = 80
-        self.dropping = 5
-        self.dy = -5
-
-class ExplodingDrone:
-    sound = Sound('sounds/explosion.mp3')
-    def __init__(self, x, y):
+    def __init__(self, x, y, scale):
         self.x = x
         self.y = y
-        self.r = 5
-        self.dr = 2
-        self.maxR = 25
+        self.scale = scale
+
 
 # class Spark:
 #     def __init__(self, x, y):
@@ -386,35 +456,6 @@ class ExplodingDrone:
 #         self.dy = random.uniform(-1, 1)
 #         self.decay = random.uniform(3, 6)
 
-def healNearbyTurrets(app):
-    HEAL_RATE = 0.025         # heals 0.5 HP per tick (slow, balanced)
-    HEAL_RADIUS = app.tileW * 1.1   # heal within *one tile*
-
-    for station in app.healthStations:
-        healed_any = False
-
-        for turret in app.turrets:
-            dist = distance(turret.x, turret.y, station.x, station.y)
-
-            # Turret inside healing radius
-            if dist <= HEAL_RADIUS:
-                healed_any = True
-                turret.health = min(app.maxTurretHealth,
-                                    turret.health + HEAL_RATE)
-
-        # --------------------------
-        # Healing pulse animation
-        # --------------------------
-        if healed_any:
-            # pulse grows faster when actively healing
-            station.pulse += app.healPulseSpeed
-        else:
-            # idle slow pulsing
-            station.pulse += 0.5
-
-        # wrap around
-        if station.pulse >= app.healPulseMax:
-            station.pulse = app.healPulseMin
 # def updateSparks(app):
 #     toRemove = []
 #     for i, s in enumerate(app.sparks):
@@ -427,267 +468,119 @@ def healNearbyTurrets(app):
 #     for i in reversed(toRemove):
 #         app.sparks.pop(i)
 
-def doExplosions(app):
-    toPop = []
-    for i in range(len(app.explodingDrones)):
-        explosion = app.explodingDrones[i]
-        explosion.r+=explosion.dr
-        if explosion.r >= 40:
-            toPop.append(i)
-    for i in reversed(toPop):
-        app.explodingDrones.pop(i)
-
-def moveDrones(app):
-    toPop=[]
-    for i in range(len(app.drones)):
-        drone=app.drones[i]
-        drone.y += drone.dy
-        if drone.y<=drone.targetY:
-            drone.y = drone.targetY
-            drone.width-=drone.dropping
-            drone.height-=drone.dropping
-            if drone.width<=10:
-                toPop.append(i)
-                app.explodingDrones.append(ExplodingDrone(drone.x, drone.y))
-    for i in reversed(toPop):
-        ExplodingDrone.sound.play()
-        app.drones.pop(i)
-
-def addBullets(app):
-    for turret in app.turrets:
-        turret.steps+=1
-        if turret.steps==60:
-            app.bullets.append(Bullet(turret.x-35, turret.y))
-            #addSpark(app, turret.x-35, turret.y)
-            turret.steps=0
-
-
-def moveBullets(app):
-    i=0
-    toPop=[]
-    for i in range(len(app.bullets)):
-        bullet = app.bullets[i]
-        bullet.x += bullet.dx
-        if bullet.x < 0:
-            toPop.append(i)
-    for i in reversed(toPop):
-        app.bullets.pop(i)
-
 def gameScreen_onMousePress(app, x, y):
+    # applied on the next tick so recordings line up with the simulation
+    app.pendingPresses.append((x, y))
 
-    # If flashing red, ignore
-    if app.errorTimer > 0:
-        return
-
-    clickedSlot = None
-
-    # Check if clicking inside top-center seed bank
-    for i, (x1, y1, x2, y2) in enumerate(app.rects):
-        if x1 <= x <= x2 and y <= app.headerHeight:
-            clickedSlot = i
-            break
-
-    # Clicked on a slot
-    if clickedSlot is not None:
-        cost = app.costs[clickedSlot]
-
-        if app.sun < cost:
-            app.errorSlot = clickedSlot
-            app.errorTimer = 120
-            app.selected = None
-        else:
-            app.selected = clickedSlot
-        return
-
-    # Clicked on field → place selected item
-    if y > app.headerHeight and app.selected is not None:
-
-        cost = app.costs[app.selected]
-
-        if app.sun >= cost:
-
-            row, col = getCell(app, x, y)
-            if row is not None:
-                cy = row * app.tileH + app.tileH / 2
-                cx = col * app.tileW + app.tileW / 2
-
-                if isLegalPlacement(app, cx, cy):
-
-                    if app.selected == 0:
-                        app.turrets.append(Turret(cx, cy))
-                        app.bullets.append(Bullet(cx-35, cy))
-                        #addSpark(app, cx-35, cy)
-                        Turret.sound.play()
-
-                    elif app.selected == 1:
-                        app.healthStations.append(HealthStation(cx, cy))
-                        HealthStation.sound.play()
-
-                    elif app.selected == 2:
-                        app.drones.append(Drone(x, y))
-                        Drone.sound.play()
-
-                    # slot 2 → reserved for future
-
-                    app.sun -= cost
-
-        app.selected = None
+def slotIcon(app, i):
+    x1, y1, x2, y2 = app.rects[i]
+    slotCenterX = (x1 + x2) / 2
+    slotCenterY = app.headerHeight * 0.37
 
-def isLegalPlacement(app, cx, cy):
-    for turret in app.turrets:
-        if (turret.x==cx and turret.y==cy):
-            return False
-    for healthStation in app.healthStations:
-        if (healthStation.x==cx and healthStation.y==cy):
-            return False
-    return True
-
-def getCell(app, x, y):
-    row = math.floor(y / app.tileH)
-    col = math.floor(x / app.tileW)
-    if (0 <= row < app.tilesHigh) and (0 <= col < app.tilesWide):
-        return (row, col)
-    else:
-        return None, None
-    
-def drawTurrets(app):
-    for turret in app.turrets:
-        drawImage(turret.image, turret.x, turret.y,
-                  align='center', width=90, height=70)
-
-        maxHP = app.maxTurretHealth
-        hp = turret.health
-
-        barWidth = 50
-        barHeight = 6
-
-        greenWidth = barWidth * (hp / maxHP)
-        redWidth = barWidth - greenWidth
-
-        # Draw GREEN (only if >0)
-        if greenWidth > 0:
-            drawRect(
-                turret.x - barWidth/2,
-                turret.y - 55,
-                max(1, greenWidth),   # <-- ensures positive width
-                barHeight,
-                fill='lime'
-            )
-
-        # Draw RED (only if >0)
-        if redWidth > 0:
-            drawRect(
-                turret.x - barWidth/2 + greenWidth,
-                turret.y - 55,
-                max(1, redWidth),      # <-- ensures positive width
-                barHeight,
-                fill='red'
-            )
+    # Limit icon by HEIGHT only (keeps aspect ratio automatically)
+    # Icon fits inside the slot WITHOUT stretching
+    iconMaxW = (x2 - x1) * 0.9   # 90% of slot width
+    iconMaxH = app.headerHeight * 0.45
+    return app.itemImages[i], slotCenterX, slotCenterY, iconMaxW, iconMaxH
 
 def drawBullets(app):
+    alpha = app.clock.alpha
+    image = app.sprites[Bullet.image]
     for bullet in app.bullets:
-        drawImage(bullet.image, bullet.x, bullet.y, 
+        x = lerp(bullet.prevX, bullet.x, alpha)
+        if not onScreen(x, bullet.y, 15, 8):
+            app.culled += 1
+            continue
+        renderer.drawImage(image, x, bullet.y,
                     align ='center', width=30, height=15)
         
-def bulletHitsZombie(bullet, zombie):
-    return distance(bullet.x, bullet.y, zombie.x, zombie.y) < zombie.r
-
-def drawHealthStations(app):
-    for station in app.healthStations:
-        drawImage(station.image, station.x, station.y,
-                  align='center', width=90, height=70)
-
-        maxHP = app.maxTurretHealth
-        hp = station.health
-
-        barWidth = 50
-        barHeight = 6
-
-        greenWidth = barWidth * (hp / maxHP)
-        redWidth = barWidth - greenWidth
-
-        if greenWidth > 0:
-            drawRect(
-                station.x - barWidth/2,
-                station.y - 55,
-                max(1, greenWidth),
-                barHeight,
-                fill='lime'
-            )
-
-        if redWidth > 0:
-            drawRect(
-                station.x - barWidth/2 + greenWidth,
-                station.y - 55,
-                max(1, redWidth),
-                barHeight,
-                fill='red'
-            )
-        
-def drawHealingAnimations(app):
-    for station in app.healthStations:
-        opacity = int(60 * (1 - (station.pulse / app.healPulseMax)))
-
-        drawCircle(station.x, station.y,
-                   station.pulse,
-                   fill=None,
-                   border='lightGreen',
-                   borderWidth=3,
-                   opacity=opacity)
-    
-def drawHealthStationsBar(app):
-    for station in app.healthStations:
-        # Draw station sprite
-        drawImage(station.image, station.x, station.y, 
-                  align='center', width=90, height=70)
-
-        # ----- HEALTH BAR -----
-        maxHP = 5
-        hp = station.health
-        barWidth = 50
-        barHeight = 6
-
-        greenWidth = barWidth * (hp / maxHP)
-        redWidth   = barWidth - greenWidth
-
-        # green HP
-        if greenWidth > 0:
-            drawRect(station.x - barWidth/2,
-                     station.y - 55,
-                     greenWidth,
-                     barHeight,
-                     fill='lime')
+############################################################
+# STRUCTURES — one pass, driven by a render descriptor per type
+############################################################
+class StructureStyle:
+    # How one structure type is drawn: which app list holds it, its
+    # sprite size and an optional extra drawn over it (the heal pulse).
+    # Health bars read maxHealth from the structure's class.
+    def __init__(self, entities, cls, width, height, overlay=None):
+        self.entities = entities
+        self.cls = cls
+        self.width = width
+        self.height = height
+        self.overlay = overlay
+
+def drawHealPulse(app, station):
+    opacity = int(60 * (1 - (station.pulse / app.healPulseMax)))
+    renderer.drawCircle(station.x, station.y,
+                        station.pulse,
+                        fill=None,
+                        border='lightGreen',
+                        borderWidth=3,
+                        opacity=opacity)
+
+def drawHealthBar(x, y, hp, maxHP):
+    barWidth = 50
+    barHeight = 6
+
+    greenWidth = barWidth * (hp / maxHP)
+    redWidth = barWidth - greenWidth
+
+    # Draw GREEN (only if >0)
+    if greenWidth > 0:
+        renderer.drawRect(x - barWidth/2, y - 55,
+                          max(1, greenWidth),   # <-- ensures positive width
+                          barHeight, fill='lime')
+
+    # Draw RED (only if >0)
+    if redWidth > 0:
+        renderer.drawRect(x - barWidth/2 + greenWidth, y - 55,
+                          max(1, redWidth),     # <-- ensures positive width
+                          barHeight, fill='red')
+
+STRUCTURE_STYLES = [
+    StructureStyle('healthStations', HealthStation, 90, 70, overlay=drawHealPulse),
+    StructureStyle('turrets', Turret, 90, 70),
+]
+
+def drawStructures(app):
+    hideFullBars = 'fullHealthBars' in app.reducedDetail
+    overlays = qualityTier(app)['overlays']
+    for style in STRUCTURE_STYLES:
+        image = app.sprites[style.cls.image]
+        maxHP = style.cls.maxHealth
+        for structure in getattr(app, style.entities):
+            renderer.drawImage(image, structure.x, structure.y,
+                               align='center', width=style.width, height=style.height)
+            if not (hideFullBars and structure.health >= maxHP):
+                drawHealthBar(structure.x, structure.y, structure.health, maxHP)
+            if style.overlay is not None and overlays:
+                style.overlay(app, structure)
 
-        # red missing HP
-        if redWidth > 0:
-            drawRect(station.x - barWidth/2 + greenWidth,
-                     station.y - 55,
-                     redWidth,
-                     barHeight,
-                     fill='red')
-        
 def drawDrones(app):
+    alpha = app.clock.alpha
+    image = app.sprites[Drone.image]
     for drone in app.drones:
-        drawImage(drone.image, drone.x, drone.y, 
+        y = lerp(drone.prevY, drone.y, alpha)
+        if not onScreen(drone.x, y, drone.width / 2, drone.height / 2):
+            app.culled += 1
+            continue
+        renderer.drawImage(image, drone.x, y,
                     align ='center', width=drone.width, height=drone.height)
 
 def drawExplodingDrones(app):
+    # a flat fill is much cheaper than the gradient on a crowded board
+    fill = BLAST_FLAT if 'effects' in app.reducedDetail else BLAST_GRADIENT
     for explosion in app.explodingDrones:
-        drawCircle(explosion.x, explosion.y,
-                    explosion.r, fill=gradient('yellow', 'orange', 'red'),
-                    opacity = 50)
+        if not onScreen(explosion.x, explosion.y, explosion.r, explosion.r):
+            app.culled += 1
+            continue
+        if app.effectsLeft == 0:
+            app.effectsDropped += 1
+            continue
+        app.effectsLeft -= 1
+        renderer.drawCircle(explosion.x, explosion.y,
+                             explosion.r, fill=fill,
+                             opacity = 50)
         
-def explosionHitsZombies(app):
-    """Kill zombies that are inside any explosion radius."""
-    for explosion in app.explodingDrones:
-        for z in app.zombies[:]:
-            d = distance(explosion.x, explosion.y, z.x, z.y)
-            if d <= explosion.r:
-                # Zombie dies instantly
-                app.zombies.remove(z)
-                app.score += 1
-                app.effects.append(Explosion(z.x, z.y))
-
 # def drawSparks(app):
 #     for s in app.sparks:
 #         drawCircle(s.x, s.y, s.radius,
@@ -699,82 +592,61 @@ def explosionHitsZombies(app):
 ############################################################
 # EXPLOSION EFFECT
 ############################################################
-class Explosion:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.radius = 10
-        self.maxRadius = 42
-        self.life = 0
-
-    def step(self):
-        self.life += 1
-        self.radius += 4
-
-    def done(self):
-        return self.radius >= self.maxRadius
-
-    def draw(self):
-        opacity = clamp(100 - self.life * 7, 0, 100)
-        drawCircle(self.x, self.y, self.radius,
-                   fill=None,
-                   border='yellow',
-                   borderWidth=4,
-                   opacity=opacity)
+# Drone blasts and explosion rings share one draw budget per frame
+# (halved when effects are LOD-reduced). Blasts go first, then rings
+# newest first; whatever is left over is counted, not drawn.
+EFFECT_BUDGET = 48
+
+# precomputed once instead of per circle per frame
+EXPLOSION_OPACITY = [clamp(100 - life * 7, 0, 100)
+                     for life in range(Explosion.maxRadius)]
+BLAST_GRADIENT = renderer.gradient('yellow', 'orange', 'red')
+BLAST_FLAT = 'orange'
+
+def startEffectBudget(app):
+    app.effectsLeft = int(EFFECT_BUDGET * qualityTier(app)['effectShare'])
+    if 'effects' in app.reducedDetail:
+        app.effectsLeft //= 2
+    app.effectsDropped = 0
+
+def drawEffects(app):
+    for fx in reversed(app.effects):
+        if not onScreen(fx.x, fx.y, fx.radius + 2, fx.radius + 2):
+            app.culled += 1
+            continue
+        if app.effectsLeft == 0:
+            app.effectsDropped += 1
+            continue
+        app.effectsLeft -= 1
+        renderer.drawCircle(fx.x, fx.y, fx.radius,
+                            fill=None,
+                            border='yellow',
+                            borderWidth=4,
+                            opacity=EXPLOSION_OPACITY[fx.life])
 
 
 ############################################################
 # GAME SETUP / RESET
 ############################################################
-def resetGame(app):
-    # -------------------------------------
-    # CORE GAME STATE RESET
-    # -------------------------------------
-    app.cursor = (SCREEN_W//2, SCREEN_H//2)
-    app.zombies = []
-    app.effects = []
-    app.turrets = []
-    app.bullets = []
-    app.healthStations = []
-    app.score = 0
-    app.baseHP = BASE_MAX_HP
-    app.wave = 1
-    app.steps = 0
-    app.gameOver = False
-    app.gameWin = False
+def resetGame(app, seed=None):
+    resetSimulation(app, seed)
+    app.clock = FixedTimestep()
+    app.pendingPresses = []
+    app.pendingKeys = []
+
+    # decorations get their own stream so they never shift the game's;
+    # seeded from a derived string, since the same seed would replay
+    # the game's exact sequence
+    app.decorRng = random.Random(f"{app.seed}/decor")
 
     app.flowers = []
-    
-    app.drones = []
-    app.explodingDrones = []
     #app.sparks = []
     app.grassSprites = []
     generateGrass(app)
     generateFlowers(app)
-    app.isTurrets= True
-    app.isDrones = False
-    app.isStations = False
-    app.healRadius = 100
-    app.healRadius = app.healRadius = int(app.tileW * 1.0)   # = exactly 1 tile radius
-    app.healAmount = 0.2
-    app.maxTurretHealth = 5
-
-    # -------------------------------------
-    # SEED BANK RESET (TOP-CENTER UI)
-    # -------------------------------------
-    app.sun = 670                     # <-- FIXED HERE
-    app.numRects = 3
-    app.headerHeight = 90
-
-    # Shrink box width to prevent horizontal stretching
-    fullWidth = app.width * 0.75
-    rectWidth = (fullWidth / app.numRects) * 0.55
-
-    # Center the seed bank
-    app.headerLeft = (app.width - rectWidth * app.numRects) / 2
-
-    # Costs for each slot
-    app.costs = [100, 150, 50]        # turret, health, bullet (future)
+    app.backgroundDirty = True     # baked on the next redraw
+    app.crowdedDetail = set()      # LOD_THRESHOLDS names over their count
+    app.reducedDetail = set()      # ... plus those the quality tier drops
 
     # Item icons
     itemsList = 'images'
@@ -784,81 +656,65 @@ def resetGame(app):
         f'{itemsList}/drone.png'
     ]
 
-    # Build the seed bank rectangles
-    app.rects = []
-    for i in range(app.numRects):
-        x1 = app.headerLeft + i * rectWidth
-        y1 = 0
-        x2 = x1 + rectWidth
-        y2 = app.headerHeight
-        app.rects.append((x1, y1, x2, y2))
-
-    # Selection states
-    app.selected = None
-    app.errorSlot = None
-    app.errorTimer = 0
-
-    # -------------------------------------
-    # LOAD SPRITE ANIMATIONS
-    # -------------------------------------
-    base = 'images/'
-    app.zombieFrames1 = [
-        f'{base}/zom0.png',
-        f'{base}/zom1.png',
-        f'{base}/zom2.png'
-    ]
-    app.attackFrames1 = [
-        f'{base}/zom3.png',
-        f'{base}/zom4.png'
-    ]
-
-    app.zombieFrames2 = [
-        f'{base}/zom5.png',
-        f'{base}/zom6.png',
-    ]
-
-    app.attackFrames2 = [
-        f'{base}/zom7.png',
-        f'{base}/zom8.png'
-    ]
-
-    # ----- WAVE / LEVEL STATE -----
-    app.level = 1
-    app.waveInLevel = 1
-    app.maxLevels = 5
-    app.maxWavesPerLevel = 3
+def newGame(app):
+    # a game the player actually starts: seeded from the command line or
+    # the replay, and recorded when asked to
+    app.gamesPlayed += 1
+    if app.gamesPlayed > 1:
+        # a recording holds one game; any after it are played live
+        app.replay = None
+    if app.replay is not None:
+        seed = app.replay.seed
+    elif app.gamesPlayed == 1:
+        seed = args.seed
+    else:
+        seed = None
+    resetGame(app, seed)
+    startRecording(app)
 
-    app.waveActive = False
-    app.waveActiveButZombies = False
-    app.timeBetweenWaves = 180    # frames between waves
-    app.timeUntilNextWave = 120   # countdown before next wave      # length of each wave in frames
-    app.waveTimer = 600
+def startRecording(app):
+    if not args.record:
+        return
+    if app.recorder is not None:
+        app.recorder.close()
+    path = args.record
+    if app.gamesPlayed > 1:
+        root, ext = os.path.splitext(path)
+        path = f"{root}-{app.gamesPlayed}{ext}"
+    app.recorder = InputRecorder(path, app.seed)
+    debugLog(app, f"Recording seed {app.seed} to {path}")
+
+def onAppStop(app):
+    # cmu_graphics leaves through os._exit, which skips flushing open files
+    if app.recorder is not None:
+        app.recorder.close()
 
 def onAppStart(app):
+    # Redraws update app (benchmark timings and the like), which the MVC
+    # checker rejects; it would also deep-hash the whole model every frame.
+    app.disableMvcChecker = True
     app.menuMusic = Sound("sounds/menuMusic.mp3")
-    app.levelUp = Sound("sounds/levelUp.mp3")
-    # -------------------------------------
-    # GAMEPLAY CONSTANTS
-    # -------------------------------------
-    app.healRadius = 60
-    app.healAmount = 0.2
-    app.maxTurretHealth = 5
-    
-    # Healing animation pulses
-    app.healPulse = 5
-    app.healPulseSpeed = 4
-    app.healPulseMax = 70
-    app.healPulseMin = 5
-
-    app.stepsPerSecond = 30
-
-    # -------------------------------------
-    # GRID / FIELD SETUP
-    # -------------------------------------
-    app.tilesWide = 20
-    app.tilesHigh = 10
-    app.tileW = SCREEN_W / app.tilesWide
-    app.tileH = SCREEN_H / app.tilesHigh
+    app.debug = True
+    app.useZombieStore = args.store
+    setupSimulation(app)
+
+    app.gamesPlayed = 0
+    app.recorder = None
+    app.replay = InputReplay(args.replay) if args.replay else None
+    app.benchmarking = args.benchmark is not None
+    if app.benchmarking:
+        # the late-game scenarios draw far more than cmu's default 2000 shapes
+        app.setMaxShapeCount(10000)
+    app.frameProfile = Profiler()
+    app.showProfiler = False
+    app.backgroundLayer = None
+    app.seedBankLayer = BakedLayer(buildSeedBank)
+    app.hudLayer = BakedLayer(buildHud)
+    app.quality = QualityController(1000 / RENDER_FPS, tier=args.quality or 0,
+                                    adaptive=args.quality is None)
+    app.stepMs = 0
+
+    app.stepsPerSecond = RENDER_FPS
 
     # Grass decoration
     app.grassSprites = []
@@ -866,38 +722,8 @@ def onAppStart(app):
     resetGame(app)
 
     generateGrass(app)
-
-    # -------------------------------------
-    # FENCE SETUP
-    # -------------------------------------
-    app.fencePosts = []
-    app.fencePlanks = []
-
-    numPosts = 6
-    postRadius = 15
-    plankThick = 12
-
-    fenceX = SCREEN_W - 180
-    fenceHeight = 650
-    fenceTop = 100
-    spacing = fenceHeight / (numPosts - 1)
-
-    app.fenceX = fenceX
-    app.fenceTop = fenceTop
-    app.fenceBottom = fenceTop + fenceHeight
-    app.fenceLeft = fenceX - 40
-    app.fenceRight = fenceX + 40
-
-    # Vertical posts
-    for i in range(numPosts):
-        y = fenceTop + i * spacing
-        app.fencePosts.append((fenceX, y, postRadius))
-
-    # Horizontal planks
-    for i in range(numPosts - 1):
-        y1 = fenceTop + i * spacing
-        y2 = fenceTop + (i + 1) * spacing
-        app.fencePlanks.append((fenceX, y1, y2, plankThick))
+    loadSprites(app)
+    primeImageCache(app)
 
     # for main menu
     app.width = 1512
@@ -915,6 +741,9 @@ def onAppStart(app):
     
     app.selectedTimeline = 0
 
+    if app.benchmarking:
+        startBenchmark(app)
+
 ############################################################
 # SPARKS
 ############################################################
@@ -951,255 +780,238 @@ def updateCursorFromSocket(app):
         pass
 
 
+
 ############################################################
 # GAME LOOP
 ############################################################
-def gameScreen_onStep(app):
-    nextWave(app)
-    # Seed bank flashing logic (red slot timer)
-    if app.errorTimer > 0:
-        app.errorTimer -= 1
-        if app.errorTimer == 0:
-            app.errorSlot = None
-    if not app.gameOver and not app.gameWin:
-        updateCursorFromSocket(app)
+def nextInputs(app):
+    inputs = {'cursor': app.cursor,
+              'presses': app.pendingPresses,
+              'keys': app.pendingKeys}
+    app.pendingPresses = []
+    app.pendingKeys = []
+    if app.replay is not None:
+        # live clicks and keys are dropped while a recording plays
+        replayed = app.replay.nextInputs()
+        if replayed is not None:
+            return replayed
+        debugLog(app, "Replay finished")
+        app.replay = None
+    return inputs
 
-    # turrets + bullets + healing
-    addBullets(app)
-    moveBullets(app)
-    healNearbyTurrets(app)
-    moveDrones(app)
-    doExplosions(app)
-    explosionHitsZombies(app)
-    #updateSparks(app)
-
-    # explosions
-    for fx in app.effects:
-        fx.step()
-    app.effects = [fx for fx in app.effects if not fx.done()]
-
-    if app.gameOver or app.gameWin:
+def gameScreen_onStep(app):
+    if app.benchmarking:
+        benchmarkStep(app)
         return
+    start = time.perf_counter()
+    prof = app.frameProfile
+    prof.start()
+    if app.replay is None and not app.gameOver and not app.gameWin:
+        updateCursorFromSocket(app)
+    prof.lap('socket')
+
+    # run however many fixed-rate ticks the wall clock says are due
+    for _ in range(app.clock.advance(time.perf_counter())):
+        inputs = nextInputs(app)
+        if app.recorder is not None:
+            app.recorder.record(inputs)
+        applyInputs(app, inputs)
+        snapshotPositions(app)
+        stepGame(app)
+    prof.lap('ticks')
+    playEvents(app)
+    prof.lap('sounds')
+    app.stepMs = (time.perf_counter() - start) * 1000
 
-    app.steps += 1
-
-    # waves
-
-
-    # spawn zombies
-    if app.waveTimer > 0: #STOP SPAWNING WHEN WAVE TIMER IS ZERO
-        randChoice = random.randint(0, 5)
-        spawnChance = 0.005 + (0.003 * (app.waveInLevel - 1)) * (app.level - 1)
-        if random.random() < spawnChance:
-            if randChoice == 5:
-                app.zombies.append(ZombieFast(app, app.waveInLevel))
-            else:
-                app.zombies.append(Zombie(app, app.waveInLevel))
-
-    cx, cy = app.cursor
-
-    # ---- ZOMBIE LOOP ----
-        # ---- ZOMBIE LOOP ----
-    for z in app.zombies[:]:
-        z.update()
-        zombieDied = False
-
-        # ----- FLASHLIGHT DAMAGE OVER TIME -----
-        if z.hit(cx, cy):
-            z.applyFlashlightDamage()
-            if z.isDead():
-                app.zombies.remove(z)
-                app.score += 1
-                app.effects.append(Explosion(z.x, z.y))
-                zombieDied = True
-
-        if zombieDied:
-            app.sun += 10
-            continue
-
-        # ----- BULLET COLLISION -----
-        for bullet in app.bullets[:]:
-            if bulletHitsZombie(bullet, z):
-                # remove 1/4 HP
-                z.timeOnCursor += (z.requiredTime / 4)
-                app.bullets.remove(bullet)
-
-                if z.isDead():
-                    app.zombies.remove(z)
-                    app.score += 1
-                    app.effects.append(Explosion(z.x, z.y))
-                    zombieDied = True
-                break  # stop checking other bullets for this zombie
-
-        if zombieDied:
-            app.sun += 10
-            continue
-
-        # -------------------------------------------------
-        # ----- TURRET COLLISION & ATTACK (SAME ROW) -----
-        # -------------------------------------------------
-        turretTarget = None
-        zombieRow = int(z.y // app.tileH)
-
-        for turret in app.turrets:
-            turretRow = int(turret.y // app.tileH)
-
-            # turret must be in SAME ROW
-            if turretRow != zombieRow:
-                continue
-
-            # ----- ZOMBIE MUST BE LEFT OF TURRET -----
-            if not (z.x + z.r <= turret.x + 40):
-                continue
-
-            # ----- ZOMBIE HAS REACHED TURRET -----
-            if z.x + z.r >= turret.x - 40:
-                turretTarget = turret
-                break
-
-        if turretTarget is not None:
-            z.attacking = True
-            z.attackTimer += 1
-
-            if z.attackTimer >= 30:
-                turretTarget.health -= 1
-                z.attackTimer = 0
-                app.effects.append(Explosion(turretTarget.x, turretTarget.y))
-                print(f"[DEBUG] Turret Hit! HP = {turretTarget.health}")
 
-                if turretTarget.health <= 0:
-                    app.turrets.remove(turretTarget)
-                    z.attacking = False  # resume walking
+############################################################
+# BENCHMARK MODE — benchmark.py's scenarios, one tick per frame,
+# timing both the tick and the redraw that follows it
+############################################################
+def startBenchmark(app):
+    app.benchNames = list(benchmark.SCENARIOS)
+    app.benchResults = []
+    startScenario(app, 0)
+
+def startScenario(app, i):
+    app.benchIndex = i
+    app.benchStepTimes = []
+    app.benchRedrawTimes = []
+    benchmark.setupScenario(app, app.benchNames[i])
+    if isinstance(renderer, CountingRenderer):
+        renderer.reset()
+
+def benchmarkStep(app):
+    name = app.benchNames[app.benchIndex]
+    if len(app.benchStepTimes) >= args.bench_ticks:
+        app.benchResults.append(benchmark.summarize(
+            name, app.benchStepTimes, app.benchRedrawTimes[1:]))
+        if isinstance(renderer, CountingRenderer):
+            app.benchResults[-1]['drawCalls'] = renderer.report()
+        if app.benchIndex + 1 == len(app.benchNames):
+            rng = random.Random(0)
+            memory = benchmark.memoryReport({
+                'Flower': lambda: Flower(500, 450, 0.5, rng),
+                'GrassSprite': lambda: GrassSprite(500, 450, 0.5),
+            })
+            benchmark.writeResults(args.benchmark, app.benchResults, 'window',
+                                   zombieStore=app.useZombieStore, memory=memory,
+                                   renderer=renderer.name)
+            benchmark.printResults(app.benchResults)
+            benchmark.printMemory(memory)
+            app.quit()
+            return
+        startScenario(app, app.benchIndex + 1)
+        name = app.benchNames[app.benchIndex]
 
-            continue
+    benchmark.topUp(app, name)
+    inputs = {'cursor': benchmark.scenarioCursor(app)}
+    start = time.perf_counter()
+    applyInputs(app, inputs)
+    snapshotPositions(app)
+    stepGame(app)
+    app.benchStepTimes.append(time.perf_counter() - start)
+    app.events.clear()      # no sounds while benchmarking
 
-        # -------------------------------------------------
-        # ----- HEALTH STATION COLLISION & ATTACK -----
-        # -------------------------------------------------
-        stationTarget = None
 
-        for station in app.healthStations:
-            stationRow = int(station.y // app.tileH)
+############################################################
+# DRAW EVERYTHING
+############################################################
+def gameScreen_redrawAll(app):
+    start = time.perf_counter()
+    app.rebakedLayer = False
+    renderer.beginFrame()
+    drawGameScreen(app)
+    renderer.endFrame()
+    if app.benchmarking:
+        app.benchRedrawTimes.append(time.perf_counter() - start)
+    elif not app.rebakedLayer:
+        # one-off re-bakes would read as a slow stretch and cost a tier
+        app.quality.update(app.stepMs + (time.perf_counter() - start) * 1000)
+
+def frameLap(app, name):
+    # charges the time and the draw calls since the last lap to name
+    app.frameProfile.lap(name)
+    renderer.lap(name)
+
+def drawGameScreen(app):
+    app.frameProfile.start()
+    app.culled = 0      # entities skipped by viewport culling this frame
+    updateDetail(app)
+    startEffectBudget(app)
 
-            if stationRow != zombieRow:
-                continue
+    # BACKGROUND + FIELD ELEMENTS
+    drawBackground(app)
+    frameLap(app, 'drawBackground')
+    drawStructures(app)
+    frameLap(app, 'drawStructures')
+    if app.backgroundLayer is None:
+        drawFlowers(app)
+        frameLap(app, 'drawFlowers')
+    drawBullets(app)
+    frameLap(app, 'drawBullets')
+    drawDrones(app)
+    drawExplodingDrones(app)
+    frameLap(app, 'drawDrones')
+    #drawSparks(app)
 
-            # ZOMBIE MUST BE LEFT OF STATION
-            if not (z.x + z.r <= station.x + 40):
-                continue
 
-            # ZOMBIE HAS REACHED STATION
-            if z.x + z.r >= station.x - 40:
-                stationTarget = station
-                break
+    # SEED BANK UI + BASE HP BAR
+    app.seedBankLayer.draw(app, (app.sun, app.selected, app.errorSlot, app.baseHP))
+    frameLap(app, 'drawSeedBank')
 
-        if stationTarget is not None:
-            z.attacking = True
-            z.attackTimer += 1
+    # ZOMBIES
+    drawZombies(app)
+    frameLap(app, 'drawZombies')
 
-            if z.attackTimer >= 30:
-                stationTarget.health -= 1
-                z.attackTimer = 0
-                app.effects.append(Explosion(stationTarget.x, stationTarget.y))
-                print(f"[DEBUG] Station Hit! HP = {stationTarget.health}")
+    # EXPLOSIONS
+    drawEffects(app)
+    frameLap(app, 'drawEffects')
 
-                if stationTarget.health <= 0:
-                    app.healthStations.remove(stationTarget)
-                    z.attacking = False  # resume walking
+    # CROSSHAIR
+    cx, cy = app.cursor
+    renderer.drawCircle(cx, cy, 22, border='white', borderWidth=3)
+    renderer.drawLine(cx - 30, cy, cx + 30, cy, fill='white')
+    renderer.drawLine(cx, cy - 30, cx, cy + 30, fill='white')
 
-            continue
+    # HUD
+    remaining = len(app.zombies) if app.waveTimer <= 0 else 0
+    app.hudLayer.draw(app, (app.level, app.waveInLevel,
+                            app.waveTimer // STEPS_PER_SECOND, remaining))
 
-        # -------------------------------------------------
-        # ----- FENCE COLLISION & ATTACK -----
-        # -------------------------------------------------
-        if (app.fenceLeft <= z.x + z.r <= app.fenceRight and
-            app.fenceTop <= z.y <= app.fenceBottom):
-
-            # zombie attacks fence
-            z.attacking = True
-
-            # deal 1 damage every second
-            z.attackTimer += 1
-            if z.attackTimer >= 30:
-                app.baseHP -= 1
-                z.attackTimer = 0
-                app.effects.append(Explosion(app.fenceX, z.y))
-                print(f"[DEBUG] Fence ATTACK! BaseHP = {app.baseHP}")
-
-                if app.baseHP <= 0:
-                    app.gameOver = True
-            continue
-        ############################################################
-        # WAVE ENGINE — CLEAN, CORRECT, NO LOOPING
-        ############################################################
-
-            # countdown timer
-    if app.waveTimer > 0:
-        app.waveTimer -= 1
-
-            # spawn zombies while timer > 0
-            
-        # ----------------------
-        # CHECK FOR WAVE END
-        # ----------------------
-        # Wave ends when timer is done AND all zombies are dead
+    if app.gameOver:
+        renderer.drawRect(0, 0, SCREEN_W, SCREEN_H, fill='black', opacity=70)
+        renderer.drawLabel("YOU LOSE!", SCREEN_W/2, SCREEN_H/2 - 60,
+                           size=80, fill='red', bold=True)
+        renderer.drawLabel(f"Final Score: {app.score}",
+                           SCREEN_W/2, SCREEN_H/2,
+                           size=40, fill='white')
+        renderer.drawLabel("Press R to restart",
+                           SCREEN_W/2, SCREEN_H/2 + 70,
+                           size=28, fill='white')
         
-def nextWave(app):    
-    if app.waveTimer <= 0 and len(app.zombies) <= 0:
-
-            # Move to next wave or level
-        if app.waveInLevel < app.maxWavesPerLevel:
-            app.waveInLevel += 1
-        else:
-            if app.level < app.maxLevels:
-                app.level += 1
-                app.levelUp.play()
-                app.waveInLevel = 1
-            else:
-                # Player finished all levels
-                app.gameWin = True
-                print("YOU WIN!")
-
-            # Start countdown to next wave
-        app.waveTimer = 600
-
-
+    if app.gameWin:
+        renderer.drawRect(0, 0, SCREEN_W, SCREEN_H, fill='black', opacity=70)
+        renderer.drawLabel("CONGRATS!", SCREEN_W/2, SCREEN_H/2 - 60,
+                           size=80, fill='lightGreen', bold=True)
+        renderer.drawLabel("You defended the fence for 5 days", SCREEN_W/2, SCREEN_H/2,
+                           size=40, fill='white', bold=True)
+        renderer.drawLabel(f"Final Score: {app.score}",
+                           SCREEN_W/2, SCREEN_H/2 + 50,
+                           size=40, fill='white')
+        renderer.drawLabel("Press R to play again!",
+                           SCREEN_W/2, SCREEN_H/2 + 110,
+                           size=28, fill='white')
+    frameLap(app, 'drawHUD')
+
+    if app.showProfiler:
+        drawProfiler(app)
+        frameLap(app, 'drawProfiler')
 
 ############################################################
-# DRAW EVERYTHING
+# RETAINED HUD LAYERS — baked into one image, redrawn only on change
 ############################################################
-def gameScreen_redrawAll(app):
-    # BACKGROUND + FIELD ELEMENTS
-    drawTiles(app)
-    drawGrass(app)
-    drawFence(app)
-    drawHealthStations(app)
-    drawHealthStationsBar(app)
-    drawHealingAnimations(app)
-    drawTurrets(app)
-    drawFlowers(app)
-    drawBullets(app)
-    drawDrones(app)
-    drawExplodingDrones(app)
-    #drawSparks(app)
-
-
-    # ============================================================
-    # SEED BANK UI (TOP-CENTER)
-    # ============================================================
+class BakedLayer:
+    # build(app, canvas) draws the layer onto a Pillow canvas whenever
+    # draw() is handed a different key (the state it depends on); in
+    # between, the layer is a single drawImage of the cropped result.
+    # Without Pillow it is drawn straight to the renderer every frame.
+    def __init__(self, build):
+        self.build = build
+        self.key = None
+        self.canvas = PILRenderer(SCREEN_W, SCREEN_H) if PILImage is not None else None
+        self.image = None
+        self.left = self.top = 0
+
+    def draw(self, app, key):
+        if self.canvas is None:
+            self.build(app, renderer)
+            return
+        if key != self.key:
+            self.key = key
+            app.rebakedLayer = True
+            self.canvas.beginFrame()
+            self.build(app, self.canvas)
+            image, self.left, self.top = self.canvas.cropped()
+            renderer.releaseImage(self.image)
+            self.image = renderer.fromPIL(image) if image is not None else None
+        if self.image is not None:
+            renderer.drawImage(self.image, self.left, self.top)
+
+def buildSeedBank(app, canvas):
     leftPanelX = app.headerLeft - 80
 
     # Sun counter box
-    drawRect(leftPanelX, 0, 80, app.headerHeight,
-             fill='khaki', border='gold', borderWidth=4)
+    canvas.drawRect(leftPanelX, 0, 80, app.headerHeight,
+                    fill='khaki', border='gold', borderWidth=4)
 
-    drawGameText(str(app.sun),
+    drawGameText(canvas, str(app.sun),
                  leftPanelX + 40,
                  app.headerHeight / 2 - 10,
                  size=28,
                  color='red')
 
-    drawGameText("FLEX $",
+    drawGameText(canvas, "FLEX $",
                  leftPanelX + 40,
                  app.headerHeight / 2 + 18,
                  size=15,
@@ -1207,8 +1019,8 @@ def gameScreen_redrawAll(app):
 
     # Seed bank bar (corrected width)
     realWidth = app.rects[-1][2] - app.rects[0][0]
-    drawRect(app.headerLeft, 0, realWidth, app.headerHeight,
-            fill='burlywood', border='sienna', borderWidth=4)
+    canvas.drawRect(app.headerLeft, 0, realWidth, app.headerHeight,
+                    fill='burlywood', border='sienna', borderWidth=4)
 
     # Slots
     for i in range(app.numRects):
@@ -1222,116 +1034,117 @@ def gameScreen_redrawAll(app):
         else:
             slotFill = 'tan'
 
-        drawRect(x1, y1, x2 - x1, y2 - y1,
-                 fill=slotFill, border='sienna', borderWidth=3)
+        canvas.drawRect(x1, y1, x2 - x1, y2 - y1,
+                        fill=slotFill, border='sienna', borderWidth=3)
 
-        slotCenterX = (x1 + x2) / 2
-        slotCenterY = app.headerHeight * 0.37
-
-        # Limit icon by HEIGHT only (keeps aspect ratio automatically)
-        # Icon fits inside the slot WITHOUT stretching
-        iconMaxW = (x2 - x1) * 0.9   # 90% of slot width
-        iconMaxH = app.headerHeight * 0.45
-
-        drawImageFit(app.itemImages[i],
-                    slotCenterX, slotCenterY,
-                    iconMaxW, iconMaxH)
+        image, slotCenterX, slotCenterY, iconMaxW, iconMaxH = slotIcon(app, i)
+        drawImageFit(canvas, image,
+                     slotCenterX, slotCenterY,
+                     iconMaxW, iconMaxH)
 
         # Cost text
-        drawGameText(str(app.costs[i]),
-                    slotCenterX,
-                    app.headerHeight * 0.85,
-                    size=20,
-                    color='white')
+        drawGameText(canvas, str(app.costs[i]),
+                     slotCenterX,
+                     app.headerHeight * 0.85,
+                     size=20,
+                     color='white')
 
     # ============================================================
     # BASE HP BAR
     # ============================================================
-    drawRect(20, 50, 260, 25, fill='red')
+    canvas.drawRect(20, 50, 260, 25, fill='red')
     if app.baseHP > 0:
         hpRatio = app.baseHP / BASE_MAX_HP
-        drawRect(20, 50, 260 * hpRatio, 25, fill='lime')
-    drawLabel(f"Base HP: {app.baseHP}", 70, 30, size=20, fill='white')
-
-    # ZOMBIES
-    for z in app.zombies:
-        z.draw()
-
-    # EXPLOSIONS
-    for fx in app.effects:
-        fx.draw()
+        canvas.drawRect(20, 50, 260 * hpRatio, 25, fill='lime')
+    canvas.drawLabel(f"Base HP: {app.baseHP}", 70, 30, size=20, fill='white')
 
-    # CROSSHAIR
-    cx, cy = app.cursor
-    drawCircle(cx, cy, 22, border='white', borderWidth=3)
-    drawLine(cx - 30, cy, cx + 30, cy, fill='white')
-    drawLine(cx, cy - 30, cx, cy + 30, fill='white')
-
-    # HUD
-    drawLabel(f"Day: {app.level}", 70, 90, size=28, fill='cyan')
-    drawLabel(f"Wave: {app.waveInLevel}/{app.maxWavesPerLevel}", 70, 130, size=28, fill='cyan')
+def buildHud(app, canvas):
+    canvas.drawLabel(f"Day: {app.level}", 70, 90, size=28, fill='cyan')
+    canvas.drawLabel(f"Wave: {app.waveInLevel}/{app.maxWavesPerLevel}", 70, 130, size=28, fill='cyan')
 
-    secondsLeft = app.waveTimer // app.stepsPerSecond
-    drawLabel(f"Time Left: {secondsLeft}s", 90, 170, size=24, fill='white')
+    secondsLeft = app.waveTimer // STEPS_PER_SECOND
+    canvas.drawLabel(f"Time Left: {secondsLeft}s", 90, 170, size=24, fill='white')
 
     # Wave timer finished but zombies still remain
     if app.waveTimer <= 0 and len(app.zombies) > 0:
-        drawLabel(f"Zombies Remaining: {len(app.zombies)}", 100, 190, size=24, fill='orange')
+        canvas.drawLabel(f"Zombies Remaining: {len(app.zombies)}", 100, 190, size=24, fill='orange')
 
-    if app.gameOver:
-        drawRect(0, 0, SCREEN_W, SCREEN_H, fill='black', opacity=70)
-        drawLabel("YOU LOSE!", SCREEN_W/2, SCREEN_H/2 - 60,
-                  size=80, fill='red', bold=True)
-        drawLabel(f"Final Score: {app.score}",
-                  SCREEN_W/2, SCREEN_H/2,
-                  size=40, fill='white')
-        drawLabel("Press R to restart",
-                  SCREEN_W/2, SCREEN_H/2 + 70,
-                  size=28, fill='white')
-        
-    if app.gameWin:
-        drawRect(0, 0, SCREEN_W, SCREEN_H, fill='black', opacity=70)
-        drawLabel("CONGRATS!", SCREEN_W/2, SCREEN_H/2 - 60,
-                  size=80, fill='lightGreen', bold=True)
-        drawLabel("You defended the fence for 5 days", SCREEN_W/2, SCREEN_H/2,
-                  size=40, fill='white', bold=True)
-        drawLabel(f"Final Score: {app.score}",
-                  SCREEN_W/2, SCREEN_H/2 + 50,
-                  size=40, fill='white')
-        drawLabel("Press R to play again!",
-                  SCREEN_W/2, SCREEN_H/2 + 110,
-                  size=28, fill='white')
+
+############################################################
+# PROFILER OVERLAY — toggled with P
+############################################################
+def toggleProfiler(app):
+    app.showProfiler = not app.showProfiler
+    for prof in (app.stepProfile, app.frameProfile):
+        prof.enabled = app.showProfiler
+        prof.reset()
+
+def drawProfiler(app):
+    rows = [('PER TICK (ms)', None)]
+    rows += list(app.stepProfile.ms.items())
+    rows.append(('total', app.stepProfile.total()))
+    rows.append(('PER FRAME (ms)', None))
+    rows += list(app.frameProfile.ms.items())
+    rows.append(('total', app.frameProfile.total()))
+    rows.append(('ENTITIES', None))
+    rows += list(entityCounts(app).items())
+    rows.append(('culled this frame', app.culled))
+    rows.append(('details reduced', len(app.reducedDetail)))
+    rows.append(('effects over budget', app.effectsDropped))
+    rows.append(('quality tier', app.quality.tier))
+    if isinstance(renderer, CountingRenderer):
+        rows.append((f'DRAW CALLS (budget {renderer.budget})', None))
+        rows += list(renderer.lastFrame.items())
+        rows.append(('total', sum(renderer.lastFrame.values())))
+        rows.append(('frames over budget', renderer.overBudget))
+
+    left = SCREEN_W - 300
+    top = 100
+    lineH = 17
+    renderer.drawRect(left, top, 290, lineH * len(rows) + 10, fill='black', opacity=60)
+    for i, (name, value) in enumerate(rows):
+        y = top + 12 + i * lineH
+        if value is None:
+            renderer.drawLabel(name, left + 10, y, size=13, fill='gold', bold=True, align='left')
+        else:
+            renderer.drawLabel(name, left + 10, y, size=13, fill='white', align='left')
+            text = str(value) if isinstance(value, int) else f"{value:.3f}"
+            renderer.drawLabel(text, left + 280, y, size=13, fill='white', align='right')
 
 ### MENU SCREEN ###
 
 def menuScreen_redrawAll(app):
-    drawImage("images/hack112menuscreen.png", 0, 0)
+    renderer.beginFrame()
+    renderer.drawImage("images/hack112menuscreen.png", 0, 0)
     drawGameStart(app)
     drawHistoryButton(app)
+    renderer.endFrame()
 
 def drawGameStart(app):
-    blue = rgb(34, 110, 239)
+    blue = renderer.rgb(34, 110, 239)
     bolded = True if app.gameStartHover else False
-    drawRect(569, 662, 186, 76, fill=blue, align='center')
-    drawLabel('Start Game', 569, 662, size=20, bold=bolded, fill='white', font='monospace')
+    renderer.drawRect(569, 662, 186, 76, fill=blue, align='center')
+    renderer.drawLabel('Start Game', 569, 662, size=20, bold=bolded, fill='white', font='monospace')
 
 def drawHistoryButton(app):
-    blue = rgb(34, 110, 239)
+    blue = renderer.rgb(34, 110, 239)
     bolded = True if app.historyHover else False
-    drawRect(943, 662, 186, 76, fill=blue, align='center')
-    drawLabel('Fence History', 943, 662, size=20, bold=bolded, fill='white', font='monospace')
+    renderer.drawRect(943, 662, 186, 76, fill=blue, align='center')
+    renderer.drawLabel('Fence History', 943, 662, size=20, bold=bolded, fill='white', font='monospace')
 
 ### HISTORY ###
 
 def history_redrawAll(app):
+    renderer.beginFrame()
     drawHistory(app)
+    renderer.endFrame()
 
 def drawHistory(app):
     pageSelect = app.selectedTimeline
-    drawImage(app.historyDict[pageSelect], 0, 0)
+    renderer.drawImage(app.historyDict[pageSelect], 0, 0)
 
     bolded = True if app.goBackHover else False
-    drawLabel('<<< Back to Menu', 1398, 808, fill='white', bold=bolded, size=20, font='arial')
+    renderer.drawLabel('<<< Back to Menu', 1398, 808, fill='white', bold=bolded, size=20, font='arial')
 
 ### MENU INTERACTION ###
 
@@ -1401,13 +1214,15 @@ def selectPage(mouseX, mouseY):
             return 6
         
 def howToPlay_redrawAll(app):
-    drawImage('images/howToPlay.png', 0, 0)
+    renderer.beginFrame()
+    renderer.drawImage('images/howToPlay.png', 0, 0)
+    renderer.endFrame()
 
 ### HOW-TO-PLAY INTERACTION ###
 
 def howToPlay_onMousePress(app, mouseX, mouseY):
     if (535 <= mouseX <= 977) and (784 <= mouseY <= 900):
-        resetGame(app)
+        newGame(app)
         setActiveScreen('gameScreen')
 
 
@@ -1426,19 +1241,19 @@ def history_onScreenActivate(app):
 def gameScreen_onKeyPress(app, key):
     if key.lower() == 'r':
         if app.gameOver:
-            resetGame(app)
+            newGame(app)
         elif app.gameWin:
             setActiveScreen('menuScreen')
+        return
+    if key.lower() == 'p':
+        toggleProfiler(app)
+        return
 
-    ### FOR DEMO
-    if key == 'w':
-        app.gameWin = True
-
-    if key == '5':
-        app.level = 5
+    app.pendingKeys.append(key)
 
 
 ############################################################
 # RUN APP
 ############################################################
-runAppWithScreens(initialScreen='menuScreen', width=SCREEN_W, height=SCREEN_H)
\ No newline at end of file
+runAppWithScreens(initialScreen='gameScreen' if args.benchmark else 'menuScreen',
+                  width=SCREEN_W, height=SCREEN_H)
@@ -0,0 +1,509 @@
+import cmu_graphics as cmu
+import collections
+import os
+
+try:
+    from PIL import Image as PILImage, ImageDraw, ImageFont
+except ImportError:
+    PILImage = None
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+try:
+    import pygame
+except ImportError:
+    pygame = None       # only the pygame backend needs it
+
+############################################################
+# RENDERERS — the primitives every draw function goes through
+############################################################
+# All three backends take cmu_graphics-style arguments (colors by name,
+# opacity 0-100, align='center' / 'left-top', ...), so final_product.py
+# draws the same way whichever one is active:
+#   cmu     draws into the cmu_graphics window, as the game always has
+#   null    draws nothing; --benchmark with it leaves only the game's own
+#           drawing code, so the gap to cmu is the rendering overhead
+#   pygame  rasterizes into an off-screen pygame Surface and hands the
+#           finished frame to the window as a single image
+class Renderer:
+    name = None
+
+    def beginFrame(self):
+        pass
+
+    def endFrame(self):
+        pass
+
+    def lap(self, name):
+        # marks the end of a named part of the frame (see CountingRenderer)
+        pass
+
+    # images: loadImage(path) / fromPIL(image) make a handle this backend
+    # draws fast; drawImage also takes a plain path
+    def loadImage(self, path):
+        return path
+
+    def fromPIL(self, image):
+        return image
+
+    def imageSize(self, image):
+        return cmu.getImageSize(image)
+
+    def releaseImage(self, image):
+        # an image from fromPIL() that will not be drawn again
+        pass
+
+    def rgb(self, r, g, b):
+        return (r, g, b)
+
+    def gradient(self, *colors):
+        return colors[len(colors) // 2]
+
+    def topLeft(self, x, y, width, height, align):
+        if align == 'center':
+            return x - width / 2, y - height / 2
+        if align == 'right':
+            return x - width, y - height / 2
+        if align == 'left':
+            return x, y - height / 2
+        return x, y
+
+    def drawImage(self, image, x, y, **kwargs):
+        pass
+
+    def drawRect(self, x, y, width, height, **kwargs):
+        pass
+
+    def drawCircle(self, x, y, r, **kwargs):
+        pass
+
+    def drawLine(self, x1, y1, x2, y2, **kwargs):
+        pass
+
+    def drawLabel(self, text, x, y, **kwargs):
+        pass
+
+class NullRenderer(Renderer):
+    name = 'null'
+
+############################################################
+# LABEL CACHE — rendered text reused while the string is unchanged
+############################################################
+class LabelCache:
+    # Bounded LRU of rendered labels keyed by (text, size, color, bold).
+    # get() renders on a miss and evicts the least recently drawn label
+    # once there are more than capacity, passing it to evict if given.
+    def __init__(self, capacity=256, evict=None):
+        self.capacity = capacity
+        self.evict = evict
+        self.labels = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, render):
+        label = self.labels.get(key)
+        if label is None:
+            self.misses += 1
+            label = self.labels[key] = render()
+            if len(self.labels) > self.capacity:
+                _, evicted = self.labels.popitem(last=False)
+                if self.evict is not None:
+                    self.evict(evicted)
+        else:
+            self.hits += 1
+            self.labels.move_to_end(key)
+        return label
+
+# cmu_graphics draws labels in Arial; the files Pillow can find it (or a
+# metric-compatible stand-in) under on Windows, macOS and Linux, then
+# DejaVu Sans, which Linux substitutes for Arial when neither is there
+LABEL_FONT_FILES = {
+    False: ['arial.ttf', 'Arial.ttf', 'LiberationSans-Regular.ttf', 'DejaVuSans.ttf'],
+    True: ['arialbd.ttf', 'Arial Bold.ttf', 'LiberationSans-Bold.ttf', 'DejaVuSans-Bold.ttf'],
+}
+labelFonts = {}         # (size, bold) -> FreeTypeFont, or None if not found
+
+def labelFont(size, bold):
+    key = (size, bold)
+    if key not in labelFonts:
+        labelFonts[key] = None
+        for path in LABEL_FONT_FILES[bold]:
+            try:
+                labelFonts[key] = ImageFont.truetype(path, size)
+                break
+            except OSError:
+                pass
+    return labelFonts[key]
+
+def rasterizeLabel(text, font, fill):
+    # Returns the label image, its ink width and its ink height above
+    # the baseline: cmu_graphics centers a label on that box, so
+    # descenders hang below it.
+    left, top, right, bottom = font.getbbox(text, anchor='ls')
+    image = PILImage.new('RGBA', (max(1, right - left), max(1, bottom - top)))
+    ImageDraw.Draw(image).text((-left, -top), text, font=font, fill=fill, anchor='ls')
+    return cmu.CMUImage(image), right - left, -top
+
+class CMURenderer(Renderer):
+    name = 'cmu'
+
+    def __init__(self):
+        self.labels = LabelCache(evict=lambda label: forgetImage(label[0]))
+
+    def loadImage(self, path):
+        # a CMUImage when Pillow is available, otherwise the path itself
+        return cmu.CMUImage(PILImage.open(path)) if PILImage is not None else path
+
+    def fromPIL(self, image):
+        return cmu.CMUImage(image)
+
+    def releaseImage(self, image):
+        forgetImage(image)
+
+    def rgb(self, r, g, b):
+        return cmu.rgb(r, g, b)
+
+    def gradient(self, *colors):
+        return cmu.gradient(*colors)
+
+    def drawImage(self, image, x, y, **kwargs):
+        cmu.drawImage(image, x, y, **kwargs)
+
+    def drawRect(self, x, y, width, height, **kwargs):
+        cmu.drawRect(x, y, width, height, **kwargs)
+
+    def drawCircle(self, x, y, r, **kwargs):
+        cmu.drawCircle(x, y, r, **kwargs)
+
+    def drawLine(self, x1, y1, x2, y2, **kwargs):
+        cmu.drawLine(x1, y1, x2, y2, **kwargs)
+
+    def drawLabel(self, text, x, y, size=12, fill='black', bold=False,
+                  align='center', font='arial', **kwargs):
+        # Arial labels become cached images when Pillow has the font;
+        # anything else (other fonts, opacity, ...) is drawn as a label.
+        face = None
+        if PILImage is not None and font == 'arial' and not kwargs and isinstance(fill, str):
+            face = labelFont(size, bold)
+        if face is None:
+            cmu.drawLabel(text, x, y, size=size, fill=fill, bold=bold,
+                          align=align, font=font, **kwargs)
+            return
+        text = str(text)
+        image, width, height = self.labels.get(
+            (text, size, fill, bold), lambda: rasterizeLabel(text, face, fill))
+        if align == 'left':
+            left = x
+        elif align == 'right':
+            left = x - width
+        else:
+            left = x - width / 2
+        cmu.drawImage(image, left, y - height / 2)
+
+def forgetImage(image):
+    # cmu_graphics keeps a copy of every CMUImage it has drawn, keyed by
+    # the wrapper, for as long as the app runs; drop one no longer shown
+    if image is not None:
+        cmu.shape_logic.activeDrawing.images.pop(image.uuid, None)
+
+class PygameRenderer(Renderer):
+    name = 'pygame'
+
+    def __init__(self, width, height):
+        if pygame is None:
+            raise RuntimeError("the pygame renderer needs pygame (pip install pygame)")
+        pygame.font.init()
+        self.surface = pygame.Surface((width, height))
+        self.images = {}        # path -> Surface
+        self.scaled = {}        # (Surface, width, height) -> Surface
+        self.fonts = {}         # (size, bold) -> Font
+        self.labels = LabelCache()
+        self.shapes = LabelCache(1024)  # translucent shapes and faded images
+        self.frame = None       # the CMUImage last handed to the window
+
+    def beginFrame(self):
+        self.surface.fill((255, 255, 255))
+
+    def endFrame(self):
+        if PILImage is None:
+            return
+        size = self.surface.get_size()
+        frame = cmu.CMUImage(PILImage.frombytes('RGB', size, self.surface.get_buffer().raw,
+                                                'raw', 'BGRX'))
+        cmu.drawImage(frame, 0, 0)
+        forgetImage(self.frame)
+        self.frame = frame
+
+    def native(self, surface):
+        # Per-pixel alpha in the frame's own byte order blits several
+        # times faster than the RGBA a PNG loads as (convert_alpha would
+        # do the same, but needs a display).
+        return pygame.image.frombytes(pygame.image.tobytes(surface, 'BGRA'),
+                                      surface.get_size(), 'BGRA')
+
+    def loadImage(self, path):
+        if path not in self.images:
+            self.images[path] = self.native(pygame.image.load(path))
+        return self.images[path]
+
+    def fromPIL(self, image):
+        image = image.convert('RGBA')
+        return pygame.image.frombytes(image.tobytes('raw', 'BGRA'), image.size, 'BGRA')
+
+    def imageSize(self, image):
+        if isinstance(image, str):
+            image = self.loadImage(image)
+        return image.get_size()
+
+    def color(self, color):
+        if isinstance(color, str):
+            return pygame.Color(color.lower())
+        return color
+
+    def blit(self, surface, x, y, opacity):
+        if opacity < 100:
+            surface = self.shapes.get((surface, opacity),
+                                      lambda: self.faded(surface.copy(), opacity))
+        self.surface.blit(surface, (round(x), round(y)))
+
+    def faded(self, surface, opacity):
+        surface.set_alpha(round(255 * opacity / 100))
+        return surface
+
+    def layer(self, width, height):
+        return pygame.Surface((max(1, round(width)), max(1, round(height))),
+                              pygame.SRCALPHA)
+
+    def drawImage(self, image, x, y, width=None, height=None,
+                  align='left-top', opacity=100):
+        if isinstance(image, str):
+            image = self.loadImage(image)
+        if width is not None:
+            key = (image, round(width), round(height))
+            if key not in self.scaled:
+                self.scaled[key] = pygame.transform.smoothscale(image, key[1:])
+            image = self.scaled[key]
+        w, h = image.get_size()
+        self.blit(image, *self.topLeft(x, y, w, h, align), opacity)
+
+    # Opaque shapes are drawn straight onto the frame. Translucent ones
+    # need a surface of their own to blend, so those are rendered once
+    # per (size, colors, opacity) and reused.
+    def drawRect(self, x, y, width, height, fill='black', border=None,
+                 borderWidth=2, align='left-top', opacity=100):
+        left, top = self.topLeft(x, y, width, height, align)
+        rect = pygame.Rect(round(left), round(top), max(1, round(width)), max(1, round(height)))
+        if opacity >= 100:
+            if fill is not None:
+                self.surface.fill(self.color(fill), rect)
+            if border is not None:
+                pygame.draw.rect(self.surface, self.color(border), rect, borderWidth)
+            return
+        shape = self.shapes.get(('rect', rect.size, fill, border, borderWidth, opacity),
+            lambda: self.rectShape(rect.size, fill, border, borderWidth, opacity))
+        self.surface.blit(shape, rect)
+
+    def rectShape(self, size, fill, border, borderWidth, opacity):
+        shape = self.layer(*size)
+        if fill is not None:
+            shape.fill(self.color(fill))
+        if border is not None:
+            pygame.draw.rect(shape, self.color(border), shape.get_rect(), borderWidth)
+        return self.faded(shape, opacity)
+
+    def drawCircle(self, x, y, r, fill='black', border=None,
+                   borderWidth=2, opacity=100):
+        if opacity >= 100:
+            center = (round(x), round(y))
+            if fill is not None:
+                pygame.draw.circle(self.surface, self.color(fill), center, r)
+            if border is not None:
+                pygame.draw.circle(self.surface, self.color(border), center, r, borderWidth)
+            return
+        shape = self.shapes.get(('circle', round(r), fill, border, borderWidth, opacity),
+            lambda: self.circleShape(round(r), fill, border, borderWidth, opacity))
+        w, h = shape.get_size()
+        self.surface.blit(shape, (round(x - w / 2), round(y - h / 2)))
+
+    def circleShape(self, r, fill, border, borderWidth, opacity):
+        shape = self.layer(2 * r + borderWidth, 2 * r + borderWidth)
+        center = shape.get_rect().center
+        if fill is not None:
+            pygame.draw.circle(shape, self.color(fill), center, r)
+        if border is not None:
+            pygame.draw.circle(shape, self.color(border), center, r, borderWidth)
+        return self.faded(shape, opacity)
+
+    def drawLine(self, x1, y1, x2, y2, fill='black', lineWidth=2, opacity=100):
+        pygame.draw.line(self.surface, self.color(fill), (x1, y1), (x2, y2), lineWidth)
+
+    def drawLabel(self, text, x, y, size=12, fill='black', bold=False,
+                  align='center', font=None, opacity=100):
+        key = (size, bold)
+        if key not in self.fonts:
+            self.fonts[key] = pygame.font.SysFont('arial', size, bold=bold)
+        label = self.labels.get((str(text), size, fill, bold),
+            lambda: self.native(self.fonts[key].render(str(text), True, self.color(fill))))
+        w, h = label.get_size()
+        self.blit(label, *self.topLeft(x, y, w, h, align), opacity)
+
+############################################################
+# BAKED LAYERS — drawing into a Pillow image instead of the window
+############################################################
+class PILRenderer(Renderer):
+    # Takes the same calls as the window backends and rasterizes them into
+    # a transparent image, so a layer that rarely changes can be drawn
+    # once and shown as one image. Images are given by path.
+    name = 'pil'
+
+    def __init__(self, width, height):
+        self.size = (width, height)
+        self.sprites = {}       # (path, width, height) -> RGBA image
+        self.beginFrame()
+
+    def beginFrame(self):
+        self.image = PILImage.new('RGBA', self.size)
+        self.canvas = ImageDraw.Draw(self.image)
+
+    def cropped(self):
+        # what was drawn, trimmed to its bounding box, and where it goes
+        box = self.image.getbbox()
+        if box is None:
+            return None, 0, 0
+        return self.image.crop(box), box[0], box[1]
+
+    def imageSize(self, image):
+        return self.sprite(image, None, None).size
+
+    def sprite(self, path, width, height):
+        key = (path, width, height)
+        if key not in self.sprites:
+            sprite = PILImage.open(path).convert('RGBA')
+            if width is not None:
+                sprite = sprite.resize((max(1, round(width)), max(1, round(height))),
+                                       PILImage.LANCZOS)
+            self.sprites[key] = sprite
+        return self.sprites[key]
+
+    def drawImage(self, image, x, y, width=None, height=None, align='left-top'):
+        sprite = self.sprite(image, width, height)
+        left, top = self.topLeft(x, y, *sprite.size, align)
+        self.image.alpha_composite(sprite, (round(left), round(top)))
+
+    def drawRect(self, x, y, width, height, fill='black', border=None,
+                 borderWidth=2, align='left-top'):
+        left, top = self.topLeft(x, y, width, height, align)
+        right, bottom = left + width - 1, top + height - 1
+        if fill is not None:
+            self.canvas.rectangle([left, top, right, bottom], fill=fill)
+        if border is not None:
+            # cmu_graphics centers the border on the edge
+            half = borderWidth / 2
+            self.canvas.rectangle([left - half, top - half, right + half, bottom + half],
+                                  outline=border, width=borderWidth)
+
+    def drawCircle(self, x, y, r, fill='black', border=None, borderWidth=2):
+        box = [x - r, y - r, x + r, y + r]
+        self.canvas.ellipse(box, fill=fill, outline=border,
+                            width=borderWidth if border is not None else 0)
+
+    def drawLine(self, x1, y1, x2, y2, fill='black', lineWidth=2):
+        self.canvas.line([x1, y1, x2, y2], fill=fill, width=lineWidth)
+
+    def drawLabel(self, text, x, y, size=12, fill='black', bold=False,
+                  align='center', font='arial'):
+        # placed on its ink box like CMURenderer's cached labels
+        face = labelFont(size, bold) or ImageFont.load_default(size)
+        text = str(text)
+        left, top, right, bottom = face.getbbox(text, anchor='ls')
+        x, y = self.topLeft(x, y, right - left, -top, align)
+        self.canvas.text((x - left, y - top), text, font=face, fill=fill, anchor='ls')
+
+############################################################
+# DRAW-CALL COUNTER — primitives per part of the frame, with a budget
+############################################################
+PRIMITIVES = ['drawImage', 'drawRect', 'drawCircle', 'drawLine', 'drawLabel']
+
+class CountingRenderer:
+    # Wraps another renderer and counts the primitives drawn through it.
+    # lap(name) charges the calls since the previous lap to name, so
+    # each frame is split by the draw function that issued them. Frames
+    # with more than budget calls are counted, and the first of each run
+    # of them is printed; totals per part and per primitive accumulate
+    # until reset().
+    def __init__(self, inner, budget):
+        self.inner = inner
+        self.budget = budget
+        self.pending = collections.Counter()
+        self.frame = {}         # part -> calls, for the frame being drawn
+        self.lastFrame = {}
+        self.reset()
+        for primitive in PRIMITIVES:
+            setattr(self, primitive, self.counted(primitive))
+
+    def reset(self):
+        self.frames = 0
+        self.overBudget = 0
+        self.wasOver = False
+        self.maxDraws = 0
+        self.parts = collections.Counter()
+        self.primitives = collections.Counter()
+
+    def counted(self, primitive):
+        draw = getattr(self.inner, primitive)
+        def countedDraw(*args, **kwargs):
+            self.pending[primitive] += 1
+            draw(*args, **kwargs)
+        return countedDraw
+
+    def __getattr__(self, name):
+        # everything that isn't a draw call goes straight to the backend
+        return getattr(self.inner, name)
+
+    def beginFrame(self):
+        self.pending.clear()
+        self.frame = {}
+        self.inner.beginFrame()
+
+    def lap(self, name):
+        self.frame[name] = self.frame.get(name, 0) + sum(self.pending.values())
+        self.primitives.update(self.pending)
+        self.pending.clear()
+
+    def endFrame(self):
+        if self.pending:
+            self.lap('other')
+        self.inner.endFrame()
+        draws = sum(self.frame.values())
+        self.frames += 1
+        self.parts.update(self.frame)
+        self.maxDraws = max(self.maxDraws, draws)
+        self.lastFrame = self.frame
+        over = draws > self.budget
+        if over:
+            self.overBudget += 1
+        if over and not self.wasOver:
+            worst = sorted(self.frame.items(), key=lambda item: -item[1])[:3]
+            print(f"frame {self.frames}: {draws} draw calls, over the budget "
+                  f"of {self.budget} ({', '.join(f'{name} {n}' for name, n in worst)})")
+        self.wasOver = over
+
+    def report(self):
+        # per-frame averages, for the benchmark report
+        frames = max(1, self.frames)
+        return {
+            'budget': self.budget,
+            'frames': self.frames,
+            'overBudget': self.overBudget,
+            'maxDraws': self.maxDraws,
+            'perFrame': {name: round(n / frames, 1) for name, n in self.parts.items()},
+            'perPrimitive': {name: round(n / frames, 1) for name, n in self.primitives.items()},
+        }
+
+RENDERERS = ['cmu', 'null', 'pygame']
+
+def makeRenderer(name, width, height):
+    if name == 'null':
+        return NullRenderer()
+    if name == 'pygame':
+        return PygameRenderer(width, height)
+    return CMURenderer()
@@ -0,0 +1,1653 @@
+import random
+import math
+import argparse
+import bisect
+import collections
+import itertools
+import operator
+import struct
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None   # ZombieStore needs NumPy; plain Zombie objects do not
+HAVE_NUMPY = np is not None
+
+############################################################
+# HEADLESS SIMULATION — game rules with no window, sound or socket
+#
+# Everything here works on an `app`-like object: the cmu_graphics
+# app in final_product.py, or a HeadlessApp driven by Simulation.
+# Sounds are reported as event names in app.events and played by
+# whoever is rendering the game.
+############################################################
+
+############################################################
+# SCREEN SIZE
+############################################################
+SCREEN_W = 1512
+SCREEN_H = 1000
+
+############################################################
+# BASE HP
+############################################################
+BASE_MAX_HP = 25
+
+NO_TARGET = -1      # Zombie.target when it is not attacking a structure
+
+STEPS_PER_SECOND = 30
+
+############################################################
+# UTILS
+############################################################
+def clamp(val, lo, hi):
+    return max(lo, min(hi, val))
+
+def distance(x1, y1, x2, y2):
+    return ((x2 - x1)**2 + (y2 - y1)**2)**0.5
+
+def debugLog(app, message):
+    if app.debug:
+        print(message)
+
+
+############################################################
+# ZOMBIE CLASS — WALK, ATTACK, HP, FLASHLIGHT DAMAGE
+############################################################
+class Zombie:
+    # Shared by every zombie of a type, so they live on the class; each
+    # instance only carries the slots below.
+    archetype = 0               # index into ZOMBIE_TYPES
+    images = ['images/zom0.png', 'images/zom1.png', 'images/zom2.png']
+    attackFrames = ['images/zom3.png', 'images/zom4.png']
+    r = 30                      # collision radius
+    animDelay = 5
+    attackAnimDelay = 10        # switch zom3 ↔ zom4 every 10 frames
+    requiredTime = 30           # 1 second of flashlight at 30 FPS
+
+    __slots__ = ('x', 'prevX', 'y', 'speed', 'frame', 'animTimer',
+                 'attacking', 'attackTimer', 'attackAnimTimer',
+                 'attackAnimFrame', 'target', 'timeOnCursor', 'handle')
+
+    def __init__(self, app, wave):
+        # position
+        self.x = -200
+        self.prevX = self.x     # x one tick ago, for render interpolation
+        self.y = app.rng.randint(100, 750)
+
+        # movement speed based on wave
+        self.speed = app.rng.uniform(4.0, 6.0) + 0.35 * (wave - 1)
+
+        # walking animation (index into images)
+        self.frame = 0
+        self.animTimer = 0
+
+        # ----- ATTACKING STATE -----
+        self.attacking = False              # zombie stops moving at fence
+        self.attackTimer = 0                # deal damage every 30 frames
+        self.attackAnimTimer = 0            # animation timer
+        self.attackAnimFrame = 0            # 0 or 1 (index into attackFrames)
+        self.target = NO_TARGET             # handle of the structure under attack
+
+        # ----- FLASHLIGHT DAMAGE -----
+        self.timeOnCursor = 0       # accumulates flashlight damage
+
+    ########################################################
+    # MOVE + WALK OR ATTACK ANIMATION
+    ########################################################
+    def update(self):
+        # If zombie is attacking the fence, it does NOT move.
+        if self.attacking:
+            # attack animation
+            self.attackAnimTimer += 1
+            if self.attackAnimTimer >= self.attackAnimDelay:
+                self.attackAnimFrame = (self.attackAnimFrame + 1) % 2
+                self.attackAnimTimer = 0
+            return
+
+        # walking movement
+        self.x += self.speed
+
+        # walking animation
+        self.animTimer += 1
+        if self.animTimer >= self.animDelay:
+            self.frame = (self.frame + 1) % len(self.images)
+            self.animTimer = 0
+
+    ########################################################
+    # CURSOR HIT DETECTION
+    ########################################################
+    def hit(self, cx, cy):
+        return math.dist((self.x, self.y), (cx, cy)) < self.r
+
+    ########################################################
+    # FLASHLIGHT DAMAGE
+    ########################################################
+    def applyFlashlightDamage(self):
+        self.timeOnCursor += 1
+
+    def isDead(self):
+        return self.timeOnCursor >= self.requiredTime
+
+
+class ZombieFast(Zombie):
+    archetype = 1
+    images = ['images/zom5.png', 'images/zom6.png']
+    attackFrames = ['images/zom7.png', 'images/zom8.png']
+    __slots__ = ()
+
+    def __init__(self, app, wave):
+        super().__init__(app, wave)
+        self.speed += 2
+
+ZOMBIE_TYPES = [Zombie, ZombieFast]
+
+
+############################################################
+# STRUCTURES + PROJECTILES
+############################################################
+class HealthStation:
+    image = "images/healthStation.png"
+    maxHealth = 5
+    __slots__ = ('x', 'y', 'health', 'pulse', 'handle')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.health = self.maxHealth
+        self.pulse = 5
+
+class Bullet:
+    image = "images/bullet.png"
+    dx = -4
+    __slots__ = ('x', 'prevX', 'y')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.prevX = x
+        self.y = y
+
+class Turret:
+    image = "images/turret.png"
+    maxHealth = 5              # turrets now have 5 HP
+    __slots__ = ('x', 'y', 'health', 'steps', 'handle')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.health = self.maxHealth
+        self.steps = 0
+
+class Drone:
+    image = 'images/drone.png'
+    dropping = 5
+    dy = -5
+    __slots__ = ('x', 'y', 'prevY', 'targetX', 'targetY', 'width', 'height')
+
+    def __init__(self, targetX, targetY):
+        self.x = targetX
+        self.y = 900
+        self.prevY = self.y
+        self.targetX = targetX
+        self.targetY = targetY
+        self.width = 80
+        self.height = 80
+
+class ExplodingDrone:
+    dr = 2
+    maxR = 25
+    __slots__ = ('x', 'y', 'r')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.r = 5
+
+
+############################################################
+# NUMPY ZOMBIE STORE — optional struct-of-arrays zombies
+############################################################
+def storeField(name):
+    def get(self):
+        return getattr(self.store, name)[self.i].item()
+    def set(self, value):
+        getattr(self.store, name)[self.i] = value
+    return property(get, set)
+
+class ZombieRef:
+    # One zombie seen through a ZombieStore; reads and writes go straight
+    # to the arrays, so drawing and kill rewards work unchanged.
+    __slots__ = ('store', 'i')
+
+    def __init__(self, store, i):
+        self.store = store
+        self.i = i
+
+    @property
+    def images(self):
+        return ZOMBIE_TYPES[self.archetype].images
+
+    @property
+    def attackFrames(self):
+        return ZOMBIE_TYPES[self.archetype].attackFrames
+
+    def isDead(self):
+        return self.timeOnCursor >= self.requiredTime
+
+class ZombieRow:
+    # A plain copy of the fields engageZombie() reads and writes, for one
+    # zombie of a ZombieStore; see ZombieStore.rows() and writeBack().
+    __slots__ = ('x', 'y', 'r', 'target', 'attacking', 'attackTimer',
+                 'timeOnCursor', 'requiredTime')
+    written = ('target', 'attacking', 'attackTimer', 'timeOnCursor')
+
+    def __init__(self, x, y, r, target, attacking, attackTimer,
+                 timeOnCursor, requiredTime):
+        self.x = x
+        self.y = y
+        self.r = r
+        self.target = target
+        self.attacking = attacking
+        self.attackTimer = attackTimer
+        self.timeOnCursor = timeOnCursor
+        self.requiredTime = requiredTime
+
+    def isDead(self):
+        return self.timeOnCursor >= self.requiredTime
+
+class ZombieStore:
+    # x, y, speed, animation timers, attack state and flashlight damage
+    # for every zombie, one NumPy array each. update(), hit() and
+    # isDead() run as one vectorized pass over the whole horde. Each
+    # field is a view of the first len(self) slots of a buffer that
+    # doubles when full, so a spawn writes one slot per field.
+    fields = {
+        'x': float, 'prevX': float, 'y': float, 'r': float, 'speed': float,
+        'frame': int, 'frameCount': int, 'animDelay': int, 'animTimer': int,
+        'attacking': bool, 'attackTimer': int, 'attackAnimTimer': int,
+        'attackAnimDelay': int, 'attackAnimFrame': int,
+        'timeOnCursor': float, 'requiredTime': float, 'archetype': int,
+        'target': int,
+    }
+    initialCapacity = 64
+
+    def __init__(self):
+        if np is None:
+            raise ImportError("ZombieStore needs NumPy (pip install numpy)")
+        self.buffers = {name: np.zeros(ZombieStore.initialCapacity, dtype)
+                        for name, dtype in ZombieStore.fields.items()}
+        self.setCount(0)
+
+    def setCount(self, count):
+        self.count = count
+        for name, buffer in self.buffers.items():
+            setattr(self, name, buffer[:count])
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return (ZombieRef(self, i) for i in range(self.count))
+
+    def append(self, zombie):
+        # Copies a freshly spawned Zombie / ZombieFast into the arrays.
+        i = self.count
+        if i == len(self.buffers['x']):
+            for name, buffer in self.buffers.items():
+                grown = np.zeros(2 * len(buffer), buffer.dtype)
+                grown[:i] = buffer
+                self.buffers[name] = grown
+        for name, buffer in self.buffers.items():
+            if name != 'frameCount':
+                buffer[i] = getattr(zombie, name)
+        self.buffers['frameCount'][i] = len(zombie.images)
+        self.setCount(i + 1)
+
+    def rows(self, indices):
+        columns = [getattr(self, name)[indices].tolist()
+                   for name in ZombieRow.__slots__]
+        return [ZombieRow(*values) for values in zip(*columns)]
+
+    def writeBack(self, indices, rows):
+        for name in ZombieRow.written:
+            getattr(self, name)[indices] = [getattr(z, name) for z in rows]
+
+    def keep(self, mask):
+        # Drops every zombie where mask is False, preserving spawn order.
+        if mask.all():
+            return
+        kept = int(np.count_nonzero(mask))
+        for name in ZombieStore.fields:
+            self.buffers[name][:kept] = getattr(self, name)[mask]
+        self.setCount(kept)
+
+    ########################################################
+    # MOVE + WALK OR ATTACK ANIMATION (all zombies at once)
+    ########################################################
+    def update(self):
+        attacking = self.attacking
+        walking = ~attacking
+
+        # attack animation
+        self.attackAnimTimer[attacking] += 1
+        flip = attacking & (self.attackAnimTimer >= self.attackAnimDelay)
+        self.attackAnimFrame[flip] = (self.attackAnimFrame[flip] + 1) % 2
+        self.attackAnimTimer[flip] = 0
+
+        # walking movement
+        self.x[walking] += self.speed[walking]
+
+        # walking animation
+        self.animTimer[walking] += 1
+        advance = walking & (self.animTimer >= self.animDelay)
+        self.frame[advance] = (self.frame[advance] + 1) % self.frameCount[advance]
+        self.animTimer[advance] = 0
+
+    ########################################################
+    # CURSOR / AREA HIT DETECTION + FLASHLIGHT DAMAGE
+    ########################################################
+    def hit(self, cx, cy):
+        return np.hypot(self.x - cx, self.y - cy) < self.r
+
+    def within(self, cx, cy, radius):
+        return np.sqrt((self.x - cx)**2 + (self.y - cy)**2) <= radius
+
+    def applyFlashlightDamage(self, mask):
+        self.timeOnCursor[mask] += 1
+
+    def isDead(self):
+        return self.timeOnCursor >= self.requiredTime
+
+    def atFence(self, app):
+        front = self.x + self.r
+        return ((app.fenceLeft <= front) & (front <= app.fenceRight) &
+                (app.fenceTop <= self.y) & (self.y <= app.fenceBottom))
+
+    def attackFence(self, app, mask):
+        # engageZombie()'s fence rule for every zombie in mask at once
+        self.attacking[mask] = True
+        self.attackTimer[mask] += 1
+        strike = mask & (self.attackTimer >= 30)
+        self.attackTimer[strike] = 0
+        for y in self.y[strike].tolist():
+            app.baseHP -= 1
+            addEffect(app, app.fenceX, y)
+            debugLog(app, f"[DEBUG] Fence ATTACK! BaseHP = {app.baseHP}")
+            if app.baseHP <= 0:
+                app.gameOver = True
+
+    def engagementCandidates(self, app):
+        # Zombies that may touch a bullet or structure this tick, or are
+        # holding a target. A superset: engageZombie() makes the exact
+        # decision for these; the rest can at most reach the fence.
+        # Every row is searched at once, on keys row * LANE_SPAN + x.
+        rows = (self.y // app.tileH).astype(int)
+        keys = rows * LANE_SPAN + self.x
+        candidates = self.target != NO_TARGET
+
+        # nearest bullet in the lane within one radius in x
+        lanes = app.bullets.lanes
+        xs = laneKeys([map(BulletLanes.bulletX, lane) for lane in lanes],
+                      [len(lane) for lane in lanes])
+        if len(xs):
+            i = np.searchsorted(xs, keys)
+            left = np.abs(keys - xs[np.maximum(i - 1, 0)])
+            right = np.abs(xs[np.minimum(i, len(xs) - 1)] - keys)
+            candidates |= np.minimum(left, right) < self.r
+
+        # a structure whose footprint the leading edge is inside
+        front = keys + self.r
+        for index in (app.turretRows, app.stationRows):
+            xs = laneKeys(index.xs, [len(row) for row in index.xs])
+            if len(xs):
+                i = np.minimum(np.searchsorted(xs, front - 40), len(xs) - 1)
+                candidates |= (front <= xs[i] + 40) & (front >= xs[i] - 40)
+        return candidates
+
+# Far more than the field is wide, so keys from different rows never
+# come within reach of each other.
+LANE_SPAN = 100000
+
+def laneKeys(rows, counts):
+    # One sorted array of row * LANE_SPAN + x over per-row sorted xs.
+    keys = np.empty(sum(counts))
+    start = 0
+    for row, (xs, count) in enumerate(zip(rows, counts)):
+        if count:
+            keys[start:start + count] = np.fromiter(xs, float, count)
+            keys[start:start + count] += row * LANE_SPAN
+            start += count
+    return keys
+
+for name in ZombieStore.fields:
+    setattr(ZombieRef, name, storeField(name))
+
+
+############################################################
+# ENTITY LIST — stable handles, O(1) removal
+############################################################
+class EntityList:
+    # Ordered container for turrets, stations and zombies. append() gives
+    # each entity a stable integer handle (entity.handle); remove() leaves
+    # a tombstone in O(1) and compact() squeezes them out once per tick.
+    # Handles are unique across every list, so get() on a destroyed
+    # entity's handle returns None rather than a stale object.
+    handles = itertools.count()
+
+    def __init__(self):
+        self.slots = []
+        self.where = {}         # handle -> slot
+        self.tombstones = 0
+
+    def append(self, entity):
+        entity.handle = next(EntityList.handles)
+        self.where[entity.handle] = len(self.slots)
+        self.slots.append(entity)
+        return entity.handle
+
+    def remove(self, entity):
+        self.slots[self.where.pop(entity.handle)] = None
+        self.tombstones += 1
+
+    def get(self, handle):
+        slot = self.where.get(handle)
+        return None if slot is None else self.slots[slot]
+
+    def compact(self):
+        if self.tombstones == 0:
+            return
+        self.slots[:] = [entity for entity in self.slots if entity is not None]
+        self.where = {entity.handle: slot
+                      for slot, entity in enumerate(self.slots)}
+        self.tombstones = 0
+
+    def __iter__(self):
+        # skips tombstones; safe while entities are being removed
+        return filter(None, self.slots)
+
+    def __len__(self):
+        return len(self.where)
+
+
+############################################################
+# SPATIAL GRID — radius queries over zombie positions
+############################################################
+class SpatialGrid:
+    # Uniform grid of 2**cellShift-px buckets (64 px by default).
+    # rebuild() re-buckets every entity by position; near(x, y, radius)
+    # returns the entities in the cells the circle overlaps. That is a
+    # superset, so callers still do their exact distance test, but only
+    # on nearby entities.
+    def __init__(self, cellShift=6):
+        self.cellShift = cellShift
+        self.cells = {}
+
+    def rebuild(self, entities):
+        shift = self.cellShift
+        cells = collections.defaultdict(list)
+        for e in entities:
+            cells[int(e.x) >> shift, int(e.y) >> shift].append(e)
+        self.cells = cells
+
+    def near(self, x, y, radius):
+        shift = self.cellShift
+        found = []
+        for col in range(int(x - radius) >> shift, (int(x + radius) >> shift) + 1):
+            for row in range(int(y - radius) >> shift, (int(y + radius) >> shift) + 1):
+                bucket = self.cells.get((col, row))
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+
+############################################################
+# PER-ROW STRUCTURE INDEX
+############################################################
+class StructureIndex:
+    # Structures bucketed by row and kept sorted by x, so a zombie finds
+    # the next structure in its lane with one binary search instead of
+    # scanning every turret / station on the board.
+    def __init__(self, app):
+        self.tileH = app.tileH
+        self.xs = [[] for _ in range(app.tilesHigh)]
+        self.items = [[] for _ in range(app.tilesHigh)]
+
+    def rowOf(self, y):
+        return int(y // self.tileH)
+
+    def add(self, structure):
+        row = self.rowOf(structure.y)
+        i = bisect.bisect_right(self.xs[row], structure.x)
+        self.xs[row].insert(i, structure.x)
+        self.items[row].insert(i, structure)
+
+    def remove(self, structure):
+        row = self.rowOf(structure.y)
+        xs, items = self.xs[row], self.items[row]
+        i = bisect.bisect_left(xs, structure.x)
+        while items[i] is not structure:
+            i += 1
+        xs.pop(i)
+        items.pop(i)
+
+    def at(self, x, y):
+        row = self.rowOf(y)
+        if not (0 <= row < len(self.xs)):
+            return None
+        xs = self.xs[row]
+        i = bisect.bisect_left(xs, x)
+        if i < len(xs) and xs[i] == x:
+            return self.items[row][i]
+        return None
+
+    def engaged(self, z):
+        # First structure in the zombie's row whose 80px-wide footprint
+        # the zombie's leading edge is inside.
+        row = self.rowOf(z.y)
+        if not (0 <= row < len(self.xs)):
+            return None
+        front = z.x + z.r
+        xs = self.xs[row]
+
+        # ----- ZOMBIE MUST BE LEFT OF STRUCTURE (front <= x + 40) -----
+        i = bisect.bisect_left(xs, front - 40)
+
+        # ----- ZOMBIE HAS REACHED STRUCTURE (front >= x - 40) -----
+        if i < len(xs) and front >= xs[i] - 40:
+            return self.items[row][i]
+        return None
+
+
+############################################################
+# PER-ROW BULLET LANES
+############################################################
+class BulletLanes:
+    # Bullets bucketed by row and kept sorted by x. Every bullet moves at
+    # the same dx, so a lane never needs re-sorting: expired bullets are
+    # always at its front, and the only bullet a zombie can hit is the
+    # one closest to it in its own lane.
+    bulletX = operator.attrgetter('x')
+
+    def __init__(self, app):
+        self.tileH = app.tileH
+        self.lanes = [[] for _ in range(app.tilesHigh)]
+        self.pool = app.pools[Bullet]
+
+    def laneOf(self, y):
+        row = int(y // self.tileH)
+        if 0 <= row < len(self.lanes):
+            return self.lanes[row]
+        return None
+
+    def append(self, bullet):
+        lane = self.laneOf(bullet.y)
+        i = bisect.bisect_right(lane, bullet.x, key=BulletLanes.bulletX)
+        lane.insert(i, bullet)
+
+    def remove(self, bullet):
+        lane = self.laneOf(bullet.y)
+        i = bisect.bisect_left(lane, bullet.x, key=BulletLanes.bulletX)
+        while lane[i] is not bullet:
+            i += 1
+        lane.pop(i)
+        self.pool.release(bullet)
+
+    def advance(self):
+        for lane in self.lanes:
+            for bullet in lane:
+                bullet.x += bullet.dx
+
+            # drop bullets that left the screen from the lane front
+            expired = 0
+            while expired < len(lane) and lane[expired].x < 0:
+                expired += 1
+            if expired:
+                for bullet in lane[:expired]:
+                    self.pool.release(bullet)
+                del lane[:expired]
+
+    def nearest(self, z):
+        lane = self.laneOf(z.y)
+        if not lane:
+            return None
+        i = bisect.bisect_left(lane, z.x, key=BulletLanes.bulletX)
+        if i == len(lane):
+            return lane[i - 1]
+        if i > 0 and z.x - lane[i - 1].x < lane[i].x - z.x:
+            return lane[i - 1]
+        return lane[i]
+
+    def __iter__(self):
+        for lane in self.lanes:
+            yield from lane
+
+    def __len__(self):
+        return sum(len(lane) for lane in self.lanes)
+
+
+############################################################
+# EXPLOSION EFFECT
+############################################################
+class Explosion:
+    maxRadius = 42
+    __slots__ = ('x', 'y', 'radius', 'life')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.radius = 10
+        self.life = 0
+
+    def step(self):
+        self.life += 1
+        self.radius += 4
+
+    def done(self):
+        return self.radius >= self.maxRadius
+
+# a mass drone strike can't hold more explosions than this at once
+EFFECT_CAPACITY = 128
+
+class EffectRing:
+    # Fixed-capacity ring of Explosion slots, allocated once. Every
+    # explosion lives the same number of ticks, so the oldest are always
+    # at the front and expire from there; a full ring overwrites its
+    # oldest. Explosions added in one tick to the same 2**cellShift px
+    # cell coalesce into one.
+    def __init__(self, capacity=EFFECT_CAPACITY, cellShift=4):
+        self.slots = [Explosion(0, 0) for _ in range(capacity)]
+        self.capacity = capacity
+        self.shift = cellShift
+        self.start = 0
+        self.count = 0
+        self.fresh = set()      # cells given an explosion this tick
+        self.coalesced = 0
+        self.overwritten = 0
+
+    def add(self, x, y):
+        cell = (int(x) >> self.shift, int(y) >> self.shift)
+        if cell in self.fresh:
+            self.coalesced += 1
+            return
+        self.fresh.add(cell)
+        if self.count == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+            self.count -= 1
+            self.overwritten += 1
+        self.slots[(self.start + self.count) % self.capacity].__init__(x, y)
+        self.count += 1
+
+    def step(self):
+        self.fresh.clear()
+        for fx in self:
+            fx.step()
+        while self.count and self.slots[self.start].done():
+            self.start = (self.start + 1) % self.capacity
+            self.count -= 1
+
+    def __iter__(self):
+        slots = self.slots
+        for i in range(self.start, self.start + self.count):
+            yield slots[i % self.capacity]
+
+    def __reversed__(self):
+        # newest first
+        slots = self.slots
+        for i in range(self.start + self.count - 1, self.start - 1, -1):
+            yield slots[i % self.capacity]
+
+    def __len__(self):
+        return self.count
+
+
+############################################################
+# OBJECT POOLS — reuse short-lived entities instead of allocating
+############################################################
+class Pool:
+    # Released objects are kept on a free list and re-initialized with
+    # __init__ on the next acquire, so steady-state play allocates almost
+    # nothing. `created` only grows when the free list runs dry.
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.live = 0
+        self.highWater = 0
+        self.created = 0
+
+    def acquire(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            obj.__init__(*args)
+        else:
+            obj = self.cls(*args)
+            self.created += 1
+        self.live += 1
+        self.highWater = max(self.highWater, self.live)
+        return obj
+
+    def release(self, obj):
+        self.live -= 1
+        self.free.append(obj)
+
+    def stats(self):
+        return {'live': self.live, 'free': len(self.free),
+                'highWater': self.highWater, 'created': self.created}
+
+POOLED_TYPES = [Bullet, ExplodingDrone, Zombie, ZombieFast]
+
+def acquire(app, cls, *args):
+    return app.pools[cls].acquire(*args)
+
+def release(app, obj):
+    app.pools[type(obj)].release(obj)
+
+def addEffect(app, x, y):
+    app.effects.add(x, y)
+
+def releaseAll(app):
+    # Hand back everything a finished game left alive before a reset.
+    for bullet in app.bullets:
+        release(app, bullet)
+    for explosion in app.explodingDrones:
+        release(app, explosion)
+    if not app.useZombieStore:
+        for z in app.zombies:
+            release(app, z)
+
+def poolStats(app):
+    return {cls.__name__: pool.stats() for cls, pool in app.pools.items()}
+
+
+############################################################
+# SETUP / RESET
+############################################################
+def setupSimulation(app):
+    # -------------------------------------
+    # GAMEPLAY CONSTANTS
+    # -------------------------------------
+    app.events = []
+    app.pools = {cls: Pool(cls) for cls in POOLED_TYPES}
+    app.stepProfile = Profiler()
+
+    # Healing animation pulses
+    app.healPulse = 5
+    app.healPulseSpeed = 4
+    app.healPulseMax = 70
+    app.healPulseMin = 5
+
+    # -------------------------------------
+    # GRID / FIELD SETUP
+    # -------------------------------------
+    app.tilesWide = 20
+    app.tilesHigh = 10
+    app.tileW = SCREEN_W / app.tilesWide
+    app.tileH = SCREEN_H / app.tilesHigh
+
+    # -------------------------------------
+    # FENCE SETUP
+    # -------------------------------------
+    app.fencePosts = []
+    app.fencePlanks = []
+
+    numPosts = 6
+    postRadius = 15
+    plankThick = 12
+
+    fenceX = SCREEN_W - 180
+    fenceHeight = 650
+    fenceTop = 100
+    spacing = fenceHeight / (numPosts - 1)
+
+    app.fenceX = fenceX
+    app.fenceTop = fenceTop
+    app.fenceBottom = fenceTop + fenceHeight
+    app.fenceLeft = fenceX - 40
+    app.fenceRight = fenceX + 40
+
+    # Vertical posts
+    for i in range(numPosts):
+        y = fenceTop + i * spacing
+        app.fencePosts.append((fenceX, y, postRadius))
+
+    # Horizontal planks
+    for i in range(numPosts - 1):
+        y1 = fenceTop + i * spacing
+        y2 = fenceTop + (i + 1) * spacing
+        app.fencePlanks.append((fenceX, y1, y2, plankThick))
+
+def resetSimulation(app, seed=None):
+    # -------------------------------------
+    # RANDOMNESS — one seeded stream per game
+    # -------------------------------------
+    app.seed = seed if seed is not None else random.randrange(2**32)
+    app.rng = random.Random(app.seed)
+
+    # -------------------------------------
+    # CORE GAME STATE RESET
+    # -------------------------------------
+    app.cursor = (SCREEN_W//2, SCREEN_H//2)
+    if hasattr(app, 'zombies'):
+        releaseAll(app)
+    app.zombies = ZombieStore() if app.useZombieStore else EntityList()
+    app.effects = EffectRing()
+    app.turrets = EntityList()
+    app.bullets = BulletLanes(app)
+    app.healthStations = EntityList()
+    app.turretRows = StructureIndex(app)
+    app.stationRows = StructureIndex(app)
+    app.zombieGrid = SpatialGrid()
+    app.score = 0
+    app.baseHP = BASE_MAX_HP
+    app.wave = 1
+    app.steps = 0
+    app.gameOver = False
+    app.gameWin = False
+
+    app.drones = []
+    app.explodingDrones = []
+    app.isTurrets= True
+    app.isDrones = False
+    app.isStations = False
+    app.healRadius = 100
+    app.healRadius = app.healRadius = int(app.tileW * 1.0)   # = exactly 1 tile radius
+    app.healAmount = 0.2
+    app.maxTurretHealth = Turret.maxHealth
+
+    # -------------------------------------
+    # SEED BANK RESET (TOP-CENTER UI)
+    # -------------------------------------
+    app.sun = 670                     # <-- FIXED HERE
+    app.numRects = 3
+    app.headerHeight = 90
+
+    # Shrink box width to prevent horizontal stretching
+    fullWidth = app.width * 0.75
+    rectWidth = (fullWidth / app.numRects) * 0.55
+
+    # Center the seed bank
+    app.headerLeft = (app.width - rectWidth * app.numRects) / 2
+
+    # Costs for each slot
+    app.costs = [100, 150, 50]        # turret, health, bullet (future)
+
+    # Build the seed bank rectangles
+    app.rects = []
+    for i in range(app.numRects):
+        x1 = app.headerLeft + i * rectWidth
+        y1 = 0
+        x2 = x1 + rectWidth
+        y2 = app.headerHeight
+        app.rects.append((x1, y1, x2, y2))
+
+    # Selection states
+    app.selected = None
+    app.errorSlot = None
+    app.errorTimer = 0
+
+    # ----- WAVE / LEVEL STATE -----
+    app.level = 1
+    app.waveInLevel = 1
+    app.maxLevels = 5
+    app.maxWavesPerLevel = 3
+
+    app.waveActive = False
+    app.waveActiveButZombies = False
+    app.timeBetweenWaves = 180    # frames between waves
+    app.timeUntilNextWave = 120   # countdown before next wave      # length of each wave in frames
+    app.waveTimer = 600
+
+
+############################################################
+# TURRETS, STATIONS, DRONES, BULLETS
+############################################################
+def healNearbyTurrets(app):
+    HEAL_RATE = 0.025         # heals 0.5 HP per tick (slow, balanced)
+    HEAL_RADIUS = app.tileW * 1.1   # heal within *one tile*
+
+    for station in app.healthStations:
+        healed_any = False
+
+        for turret in app.turrets:
+            dist = distance(turret.x, turret.y, station.x, station.y)
+
+            # Turret inside healing radius
+            if dist <= HEAL_RADIUS:
+                healed_any = True
+                turret.health = min(app.maxTurretHealth,
+                                    turret.health + HEAL_RATE)
+
+        # --------------------------
+        # Healing pulse animation
+        # --------------------------
+        if healed_any:
+            # pulse grows faster when actively healing
+            station.pulse += app.healPulseSpeed
+        else:
+            # idle slow pulsing
+            station.pulse += 0.5
+
+        # wrap around
+        if station.pulse >= app.healPulseMax:
+            station.pulse = app.healPulseMin
+
+def doExplosions(app):
+    toPop = []
+    for i in range(len(app.explodingDrones)):
+        explosion = app.explodingDrones[i]
+        explosion.r+=explosion.dr
+        if explosion.r >= 40:
+            toPop.append(i)
+    for i in reversed(toPop):
+        release(app, app.explodingDrones.pop(i))
+
+def moveDrones(app):
+    toPop=[]
+    for i in range(len(app.drones)):
+        drone=app.drones[i]
+        drone.y += drone.dy
+        if drone.y<=drone.targetY:
+            drone.y = drone.targetY
+            drone.width-=drone.dropping
+            drone.height-=drone.dropping
+            if drone.width<=10:
+                toPop.append(i)
+                app.explodingDrones.append(
+                    acquire(app, ExplodingDrone, drone.x, drone.y))
+    for i in reversed(toPop):
+        app.events.append('droneExploded')
+        app.drones.pop(i)
+
+def addBullets(app):
+    for turret in app.turrets:
+        turret.steps+=1
+        if turret.steps==60:
+            app.bullets.append(acquire(app, Bullet, turret.x-35, turret.y))
+            turret.steps=0
+
+
+def moveBullets(app):
+    app.bullets.advance()
+
+def bulletHitsZombie(bullet, zombie):
+    return distance(bullet.x, bullet.y, zombie.x, zombie.y) < zombie.r
+
+def explosionHitsZombies(app):
+    """Kill zombies that are inside any explosion radius."""
+    if app.useZombieStore:
+        store = app.zombies
+        for explosion in app.explodingDrones:
+            hit = store.within(explosion.x, explosion.y, explosion.r)
+            for i in np.flatnonzero(hit):
+                app.score += 1
+                addEffect(app, store.x[i].item(), store.y[i].item())
+            store.keep(~hit)
+        return
+
+    if not app.explodingDrones:
+        return
+    # Bucketing the horde costs about one linear pass, so the grid only
+    # pays off when several drones are exploding in the same tick.
+    if len(app.explodingDrones) > 1:
+        app.zombieGrid.rebuild(app.zombies)
+        nearby = app.zombieGrid.near
+    else:
+        nearby = lambda x, y, r: list(app.zombies)
+    killed = set()
+    for explosion in app.explodingDrones:
+        for z in nearby(explosion.x, explosion.y, explosion.r):
+            if z in killed:
+                continue
+            d = distance(explosion.x, explosion.y, z.x, z.y)
+            if d <= explosion.r:
+                # Zombie dies instantly
+                killed.add(z)
+                app.zombies.remove(z)
+                app.score += 1
+                addEffect(app, z.x, z.y)
+                release(app, z)
+
+
+############################################################
+# PLACEMENT (SEED BANK + FIELD CLICKS)
+############################################################
+def handleMousePress(app, x, y):
+
+    # If flashing red, ignore
+    if app.errorTimer > 0:
+        return
+
+    clickedSlot = None
+
+    # Check if clicking inside top-center seed bank
+    for i, (x1, y1, x2, y2) in enumerate(app.rects):
+        if x1 <= x <= x2 and y <= app.headerHeight:
+            clickedSlot = i
+            break
+
+    # Clicked on a slot
+    if clickedSlot is not None:
+        cost = app.costs[clickedSlot]
+
+        if app.sun < cost:
+            app.errorSlot = clickedSlot
+            app.errorTimer = 120
+            app.selected = None
+        else:
+            app.selected = clickedSlot
+        return
+
+    # Clicked on field → place selected item
+    if y > app.headerHeight and app.selected is not None:
+
+        cost = app.costs[app.selected]
+
+        if app.sun >= cost:
+
+            row, col = getCell(app, x, y)
+            if row is not None:
+                cy = row * app.tileH + app.tileH / 2
+                cx = col * app.tileW + app.tileW / 2
+
+                if isLegalPlacement(app, cx, cy):
+
+                    if app.selected == 0:
+                        placeTurret(app, cx, cy)
+                        app.events.append('turretPlaced')
+
+                    elif app.selected == 1:
+                        placeStation(app, cx, cy)
+                        app.events.append('stationPlaced')
+
+                    elif app.selected == 2:
+                        app.drones.append(Drone(x, y))
+                        app.events.append('droneLaunched')
+
+                    # slot 2 → reserved for future
+
+                    app.sun -= cost
+
+        app.selected = None
+
+def placeTurret(app, cx, cy):
+    turret = Turret(cx, cy)
+    app.turrets.append(turret)
+    app.turretRows.add(turret)
+    app.bullets.append(acquire(app, Bullet, cx-35, cy))
+    return turret
+
+def placeStation(app, cx, cy):
+    station = HealthStation(cx, cy)
+    app.healthStations.append(station)
+    app.stationRows.add(station)
+    return station
+
+def isLegalPlacement(app, cx, cy):
+    if app.turretRows.at(cx, cy) is not None:
+        return False
+    if app.stationRows.at(cx, cy) is not None:
+        return False
+    return True
+
+def getCell(app, x, y):
+    row = math.floor(y / app.tileH)
+    col = math.floor(x / app.tileW)
+    if (0 <= row < app.tilesHigh) and (0 <= col < app.tilesWide):
+        return (row, col)
+    else:
+        return None, None
+
+def quantizeCursor(cursor):
+    # Cursors are whole pixels so a recording replays them exactly.
+    return (int(clamp(cursor[0], 0, SCREEN_W)),
+            int(clamp(cursor[1], 0, SCREEN_H)))
+
+def applyInputs(app, inputs):
+    # One tick's worth of input: 'cursor': (x, y), 'presses': [(x, y)],
+    # 'keys': [key]. Both the window and Simulation go through here.
+    cursor = inputs.get('cursor')
+    if cursor is not None and not app.gameOver and not app.gameWin:
+        app.cursor = quantizeCursor(cursor)
+    for (x, y) in inputs.get('presses', ()):
+        handleMousePress(app, x, y)
+    for key in inputs.get('keys', ()):
+        handleKeyPress(app, key)
+
+def handleKeyPress(app, key):
+    ### FOR DEMO
+    if key == 'w':
+        app.gameWin = True
+
+    if key == '5':
+        app.level = 5
+
+
+def structureByHandle(app, handle):
+    structure = app.turrets.get(handle)
+    if structure is None:
+        structure = app.healthStations.get(handle)
+    return structure
+
+def compactEntities(app):
+    # Once per tick: squeeze out last tick's tombstones.
+    if not app.useZombieStore:
+        app.zombies.compact()
+    app.turrets.compact()
+    app.healthStations.compact()
+
+def rewardKill(app, z):
+    app.score += 1
+    addEffect(app, z.x, z.y)
+    app.sun += 10
+
+def engageZombie(app, z):
+    # Bullets, structures and the fence for one zombie. Returns True if
+    # a bullet killed it; the caller removes it and rewards the kill.
+
+    # ----- TARGET DESTROYED BY ANOTHER ZOMBIE → RESUME WALKING -----
+    if z.target != NO_TARGET and structureByHandle(app, z.target) is None:
+        z.attacking = False
+        z.target = NO_TARGET
+
+    # ----- BULLET COLLISION -----
+    bullet = app.bullets.nearest(z)
+    if bullet is not None and bulletHitsZombie(bullet, z):
+        # remove 1/4 HP
+        z.timeOnCursor += (z.requiredTime / 4)
+        app.bullets.remove(bullet)
+
+        if z.isDead():
+            return True
+
+    # -------------------------------------------------
+    # ----- TURRET COLLISION & ATTACK (SAME ROW) -----
+    # -------------------------------------------------
+    turretTarget = app.turretRows.engaged(z)
+
+    if turretTarget is not None:
+        z.attacking = True
+        z.target = turretTarget.handle
+        z.attackTimer += 1
+
+        if z.attackTimer >= 30:
+            turretTarget.health -= 1
+            z.attackTimer = 0
+            addEffect(app, turretTarget.x, turretTarget.y)
+            debugLog(app, f"[DEBUG] Turret Hit! HP = {turretTarget.health}")
+
+            if turretTarget.health <= 0:
+                app.turrets.remove(turretTarget)
+                app.turretRows.remove(turretTarget)
+                z.attacking = False  # resume walking
+                z.target = NO_TARGET
+
+        return False
+
+    # -------------------------------------------------
+    # ----- HEALTH STATION COLLISION & ATTACK -----
+    # -------------------------------------------------
+    stationTarget = app.stationRows.engaged(z)
+
+    if stationTarget is not None:
+        z.attacking = True
+        z.target = stationTarget.handle
+        z.attackTimer += 1
+
+        if z.attackTimer >= 30:
+            stationTarget.health -= 1
+            z.attackTimer = 0
+            addEffect(app, stationTarget.x, stationTarget.y)
+            debugLog(app, f"[DEBUG] Station Hit! HP = {stationTarget.health}")
+
+            if stationTarget.health <= 0:
+                app.healthStations.remove(stationTarget)
+                app.stationRows.remove(stationTarget)
+                z.attacking = False  # resume walking
+                z.target = NO_TARGET
+
+        return False
+
+    # -------------------------------------------------
+    # ----- FENCE COLLISION & ATTACK -----
+    # -------------------------------------------------
+    if (app.fenceLeft <= z.x + z.r <= app.fenceRight and
+        app.fenceTop <= z.y <= app.fenceBottom):
+
+        # zombie attacks fence
+        z.attacking = True
+
+        # deal 1 damage every second
+        z.attackTimer += 1
+        if z.attackTimer >= 30:
+            app.baseHP -= 1
+            z.attackTimer = 0
+            addEffect(app, app.fenceX, z.y)
+            debugLog(app, f"[DEBUG] Fence ATTACK! BaseHP = {app.baseHP}")
+
+            if app.baseHP <= 0:
+                app.gameOver = True
+    return False
+
+def updateZombieStore(app, cx, cy):
+    # Same rules as the object loop in stepGame: movement, animation, the
+    # flashlight and the fence run as vectorized passes, and only zombies
+    # that can touch a bullet or structure go through engageZombie(), on
+    # plain copies of their fields.
+    store = app.zombies
+    if len(store) == 0:
+        return
+    store.update()
+
+    hit = store.hit(cx, cy)
+    store.applyFlashlightDamage(hit)
+    alive = ~(hit & store.isDead())
+    for i in np.flatnonzero(~alive):
+        rewardKill(app, ZombieRef(store, i))
+
+    candidates = alive & store.engagementCandidates(app)
+    indices = np.flatnonzero(candidates)
+    rows = store.rows(indices)
+    for i, z in zip(indices.tolist(), rows):
+        if engageZombie(app, z):
+            rewardKill(app, z)
+            alive[i] = False
+    store.writeBack(indices, rows)
+    store.attackFence(app, alive & ~candidates & store.atFence(app))
+
+    store.keep(alive)
+
+
+############################################################
+# GAME LOOP
+############################################################
+def stepGame(app):
+    prof = app.stepProfile
+    prof.start()
+    compactEntities(app)
+    nextWave(app)
+    # Seed bank flashing logic (red slot timer)
+    if app.errorTimer > 0:
+        app.errorTimer -= 1
+        if app.errorTimer == 0:
+            app.errorSlot = None
+    prof.lap('waves')
+
+    # turrets + bullets + healing
+    addBullets(app)
+    prof.lap('addBullets')
+    moveBullets(app)
+    prof.lap('moveBullets')
+    healNearbyTurrets(app)
+    prof.lap('healNearbyTurrets')
+    moveDrones(app)
+    doExplosions(app)
+    prof.lap('drones')
+    explosionHitsZombies(app)
+    prof.lap('explosionHitsZombies')
+
+    # explosions
+    app.effects.step()
+
+    if app.gameOver or app.gameWin:
+        return
+
+    app.steps += 1
+
+    # spawn zombies
+    if app.waveTimer > 0: #STOP SPAWNING WHEN WAVE TIMER IS ZERO
+        randChoice = app.rng.randint(0, 5)
+        spawnChance = 0.005 + (0.003 * (app.waveInLevel - 1)) * (app.level - 1)
+        if app.rng.random() < spawnChance:
+            kind = ZombieFast if randChoice == 5 else Zombie
+            z = acquire(app, kind, app, app.waveInLevel)
+            app.zombies.append(z)
+            if app.useZombieStore:
+                release(app, z)     # the store copied it
+    prof.lap('effects+spawn')
+
+    cx, cy = app.cursor
+
+    # ---- ZOMBIE LOOP ----
+    if app.useZombieStore:
+        updateZombieStore(app, cx, cy)
+    else:
+        for z in app.zombies:
+            z.update()
+
+            # ----- FLASHLIGHT DAMAGE OVER TIME -----
+            if z.hit(cx, cy):
+                z.applyFlashlightDamage()
+                if z.isDead():
+                    app.zombies.remove(z)
+                    rewardKill(app, z)
+                    release(app, z)
+                    continue
+
+            if engageZombie(app, z):
+                app.zombies.remove(z)
+                rewardKill(app, z)
+                release(app, z)
+    prof.lap('zombies')
+
+    ############################################################
+    # WAVE ENGINE — countdown; spawning stops at zero
+    ############################################################
+    if app.waveTimer > 0:
+        app.waveTimer -= 1
+
+def nextWave(app):
+    # Wave ends when timer is done AND all zombies are dead
+    if app.waveTimer <= 0 and len(app.zombies) <= 0:
+
+            # Move to next wave or level
+        if app.waveInLevel < app.maxWavesPerLevel:
+            app.waveInLevel += 1
+        else:
+            if app.level < app.maxLevels:
+                app.level += 1
+                app.events.append('levelUp')
+                app.waveInLevel = 1
+            else:
+                # Player finished all levels
+                app.gameWin = True
+                debugLog(app, "YOU WIN!")
+
+            # Start countdown to next wave
+        app.waveTimer = 600
+
+
+############################################################
+# PROFILING
+############################################################
+class Profiler:
+    # Lap timer for the phases of a tick or a frame: start(), then
+    # lap(name) after each phase charges it the time since the last lap.
+    # Each phase keeps a rolling average in ms. Left in all the time;
+    # while disabled a lap is one attribute check.
+    smoothing = 0.05
+
+    def __init__(self):
+        self.enabled = False
+        self.ms = {}
+        self.last = 0.0
+
+    def start(self):
+        if self.enabled:
+            self.last = time.perf_counter()
+
+    def lap(self, name):
+        if self.enabled:
+            now = time.perf_counter()
+            ms = (now - self.last) * 1000
+            avg = self.ms.get(name)
+            self.ms[name] = ms if avg is None else avg + (ms - avg) * self.smoothing
+            self.last = now
+
+    def total(self):
+        return sum(self.ms.values())
+
+    def reset(self):
+        self.ms.clear()
+
+def entityCounts(app):
+    return {
+        'zombies': len(app.zombies),
+        'turrets': len(app.turrets),
+        'stations': len(app.healthStations),
+        'bullets': len(app.bullets),
+        'drones': len(app.drones) + len(app.explodingDrones),
+        'effects': len(app.effects),
+    }
+
+
+############################################################
+# FIXED TIMESTEP
+############################################################
+class FixedTimestep:
+    # Turns wall-clock time into a whole number of fixed simulation ticks,
+    # however often the caller runs. alpha is how far the clock is between
+    # the last tick and the next one, for interpolating entity positions.
+    # After a long stall only maxTicks are run, so the game slows down
+    # instead of spiralling into ever longer catch-up frames.
+    def __init__(self, tickRate=STEPS_PER_SECOND, maxTicks=8):
+        self.dt = 1 / tickRate
+        self.maxTicks = maxTicks
+        self.accumulator = 0.0
+        self.last = None
+        self.alpha = 0.0
+
+    def advance(self, now):
+        if self.last is None:
+            self.last = now
+        elapsed = min(now - self.last, self.maxTicks * self.dt)
+        self.last = now
+        self.accumulator += elapsed
+        ticks = int(self.accumulator / self.dt)
+        self.accumulator -= ticks * self.dt
+        self.alpha = self.accumulator / self.dt
+        return ticks
+
+def lerp(a, b, t):
+    return a + (b - a) * t
+
+def snapshotPositions(app):
+    # Remember where everything that moves was before the next tick.
+    if app.useZombieStore:
+        app.zombies.prevX[:] = app.zombies.x
+    else:
+        for z in app.zombies:
+            z.prevX = z.x
+    for bullet in app.bullets:
+        bullet.prevX = bullet.x
+    for drone in app.drones:
+        drone.prevY = drone.y
+
+
+############################################################
+# INPUT RECORDING + REPLAY
+############################################################
+REPLAY_MAGIC = b'FDRP'
+REPLAY_VERSION = 1
+REPLAY_HEADER = struct.Struct('<4sBQ')     # magic, version, seed
+
+HAS_CURSOR = 1
+HAS_EVENTS = 2
+
+class InputRecorder:
+    # Streams one record per tick to a compact binary file: a flags byte,
+    # the cursor as two uint16s, then any mouse presses (uint16 pairs) and
+    # key presses (length-prefixed UTF-8). An idle tick costs 5 bytes.
+    def __init__(self, path, seed):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, seed))
+        self.ticks = 0
+
+    def record(self, inputs):
+        inputs = inputs or {}
+        cursor = inputs.get('cursor')
+        presses = inputs.get('presses', ())
+        keys = [key.encode('utf-8') for key in inputs.get('keys', ())]
+
+        flags = 0
+        if cursor is not None:
+            flags |= HAS_CURSOR
+        if presses or keys:
+            flags |= HAS_EVENTS
+        out = bytearray(struct.pack('<B', flags))
+        if cursor is not None:
+            out += struct.pack('<HH', *quantizeCursor(cursor))
+        if flags & HAS_EVENTS:
+            out += struct.pack('<BB', len(presses), len(keys))
+            for (x, y) in presses:
+                out += struct.pack('<HH', int(x), int(y))
+            for key in keys:
+                out += struct.pack('<B', len(key)) + key
+        self.file.write(out)
+
+        self.ticks += 1
+        if self.ticks % STEPS_PER_SECOND == 0:
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class InputReplay:
+    # Reads an InputRecorder file back; nextInputs() hands out one tick at
+    # a time and returns None once the recording is used up.
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, self.seed = REPLAY_HEADER.unpack_from(data, 0)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a Fence Defense v{REPLAY_VERSION} replay")
+
+        self.ticks = []
+        pos = REPLAY_HEADER.size
+        while pos < len(data):
+            flags = data[pos]
+            pos += 1
+            inputs = {}
+            if flags & HAS_CURSOR:
+                inputs['cursor'] = struct.unpack_from('<HH', data, pos)
+                pos += 4
+            if flags & HAS_EVENTS:
+                numPresses, numKeys = struct.unpack_from('<BB', data, pos)
+                pos += 2
+                inputs['presses'] = []
+                for _ in range(numPresses):
+                    inputs['presses'].append(struct.unpack_from('<HH', data, pos))
+                    pos += 4
+                inputs['keys'] = []
+                for _ in range(numKeys):
+                    length = data[pos]
+                    inputs['keys'].append(data[pos+1:pos+1+length].decode('utf-8'))
+                    pos += 1 + length
+            self.ticks.append(inputs)
+        self.position = 0
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def done(self):
+        return self.position >= len(self.ticks)
+
+    def nextInputs(self, sim=None):
+        if self.done():
+            return None
+        inputs = self.ticks[self.position]
+        self.position += 1
+        return inputs
+
+
+############################################################
+# HEADLESS DRIVER
+############################################################
+class HeadlessApp:
+    # Stand-in for the cmu_graphics app: just an attribute bag.
+    def __init__(self):
+        self.width = SCREEN_W
+        self.height = SCREEN_H
+        self.stepsPerSecond = STEPS_PER_SECOND
+        self.useZombieStore = False
+
+class Simulation:
+    """Runs the game rules without a window.
+
+    zombieStore=True keeps zombies in a NumPy ZombieStore instead of a
+    list of Zombie objects. The same seed and the same inputs always
+    give the same game; startRecording(path) captures the inputs.
+
+    step(inputs) advances one tick. inputs is an optional dict with
+    'cursor': (x, y), 'presses': [(x, y), ...] and 'keys': [key, ...],
+    applied before the tick; 'r' restarts a finished game. Returns the
+    tick's events (sound cues such as 'turretPlaced' or 'levelUp').
+    """
+    def __init__(self, debug=False, zombieStore=False, seed=None):
+        self.app = HeadlessApp()
+        self.app.debug = debug
+        self.app.useZombieStore = zombieStore
+        setupSimulation(self.app)
+        resetSimulation(self.app, seed)
+        self.ticks = 0
+        self.recorder = None
+
+    def reset(self, seed=None):
+        resetSimulation(self.app, seed)
+        self.ticks = 0
+
+    def startRecording(self, path):
+        self.recorder = InputRecorder(path, self.app.seed)
+
+    def step(self, inputs=None):
+        app = self.app
+        app.events = []
+        if self.recorder is not None:
+            self.recorder.record(inputs)
+        if inputs:
+            keys = inputs.get('keys', ())
+            if (app.gameOver or app.gameWin) and any(k.lower() == 'r' for k in keys):
+                # the next game's seed comes from this one, so replays
+                # reproduce restarts too
+                resetSimulation(app, app.rng.randrange(2**32))
+            applyInputs(app, inputs)
+        stepGame(app)
+        self.ticks += 1
+        return app.events
+
+    def run(self, ticks, inputsFn=None):
+        # inputsFn(sim) -> inputs dict (or None) for the next tick
+        for _ in range(ticks):
+            self.step(inputsFn(self) if inputsFn else None)
+
+
+def replay(path, zombieStore=False):
+    # Re-runs a recording headless and returns the finished Simulation.
+    recording = InputReplay(path)
+    sim = Simulation(zombieStore=zombieStore, seed=recording.seed)
+    sim.run(len(recording), recording.nextInputs)
+    return sim
+
+def autoPilot(sim):
+    # Hold the flashlight on the zombie closest to the fence and restart
+    # once the game ends, so long runs keep exercising real waves.
+    app = sim.app
+    if app.gameOver or app.gameWin:
+        return {'keys': ['r']}
+    if len(app.zombies) == 0:
+        return None
+    lead = max(app.zombies, key=lambda z: z.x)
+    return {'cursor': (lead.x, lead.y)}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the game headless.")
+    parser.add_argument('ticks', type=int, nargs='?', default=20000)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--store', action='store_true',
+                        help="use the NumPy zombie store")
+    parser.add_argument('--record', metavar='PATH',
+                        help="record the auto-pilot's inputs")
+    parser.add_argument('--replay', metavar='PATH',
+                        help="replay a recording instead of the auto-pilot")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.replay:
+        sim = replay(args.replay, zombieStore=args.store)
+        ticks = sim.ticks
+    else:
+        ticks = args.ticks
+        sim = Simulation(zombieStore=args.store, seed=args.seed)
+        if args.record:
+            sim.startRecording(args.record)
+        sim.run(ticks, autoPilot)
+        if args.record:
+            sim.recorder.close()
+    elapsed = time.perf_counter() - start
+    app = sim.app
+    print(f"{ticks} ticks in {elapsed:.2f}s ({ticks / elapsed:.0f} ticks/s)")
+    print(f"seed {app.seed}: Day {app.level} Wave {app.waveInLevel}, score {app.score}, "
+          f"base HP {app.baseHP}, zombies {len(app.zombies)}")
+    for name, stats in poolStats(app).items():
+        print(f"  {name:<15} live {stats['live']:>4}  free {stats['free']:>4}  "
+              f"high-water {stats['highWater']:>4}  created {stats['created']:>4}")